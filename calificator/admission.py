@@ -0,0 +1,189 @@
+import os
+import heapq
+import numpy as np
+import pandas as pd
+
+from config import VACANCIES, WAITLIST_SIZE, TIE_BREAK_SECTIONS, SECTION_COLUMNS
+
+class _Descending:
+    """Wrap a value so that it compares in reverse order inside a heap key"""
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __lt__(self, other):
+        return self.value > other.value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+def tie_break_scores(result):
+    """Section scores of a detailed result row in its career's tie-break order"""
+    return tuple(result[SECTION_COLUMNS[section]] for section in TIE_BREAK_SECTIONS[result['carrera_asignada']])
+
+def merit_key(result, score_column='puntaje_total'):
+    """
+    Ascending sort key of a detailed result row (also as read from CSV) in
+    admission order: area, then score, then section scores in the career's
+    tie-break order (higher first), then the lowest LITHO
+    """
+    return (
+        (result['area_postulada'], -float(result[score_column]))
+        + tuple(-float(score) for score in tie_break_scores(result))
+        + (str(result['codigo_estudiante']),)
+    )
+
+class AdmissionSelector:
+    """
+    Streaming admission selection.
+
+    Keeps one bounded min-heap per career area holding only the best
+    (vacancies + waitlist) applicants seen so far, so the whole cohort
+    never has to be materialized and sorted. The heap root is always the
+    weakest retained applicant and is the one evicted when a better one
+    arrives.
+    """
+
+    def __init__(self, vacancies=None, waitlist_size=WAITLIST_SIZE, score_column='puntaje_total'):
+        self.vacancies = dict(VACANCIES if vacancies is None else vacancies)
+        self.waitlist_size = waitlist_size
+        self.score_column = score_column
+        self.heaps = {area: [] for area in self.vacancies}
+        self.seen = {area: 0 for area in self.vacancies}
+
+    def ranking_key(self, result):
+        """
+        Build the heap key for a detailed result row: the score column, then the
+        section scores in the career's tie-break order (higher is better),
+        then LITHO (lower is better)
+        """
+        return (
+            (result[self.score_column],)
+            + tie_break_scores(result)
+            + (_Descending(str(result['codigo_estudiante'])),)
+        )
+
+    def add(self, result):
+        """Feed one detailed result row (as built by grade_exams)"""
+        area = result['area_postulada']
+        if area not in self.heaps:
+            print(f"Warning: No vacancies configured for {area}")
+            return
+
+        self.seen[area] += 1
+        capacity = self.vacancies[area] + self.waitlist_size
+        if capacity <= 0:
+            return
+
+        heap = self.heaps[area]
+        # The sequence number keeps the tuple comparison away from the dict
+        entry = (self.ranking_key(result), self.seen[area], result)
+        if len(heap) < capacity:
+            heapq.heappush(heap, entry)
+        elif heap[0][0] < entry[0]:
+            heapq.heapreplace(heap, entry)
+
+    def ranked(self, area):
+        """Return the retained applicants of an area, best first"""
+        return [entry[2] for entry in sorted(self.heaps[area], reverse=True)]
+
+    def results(self):
+        """
+        Split the retained applicants into admitted and waitlist lists and
+        compute the cut-off score of every career area
+        """
+        admitted = []
+        waitlist = []
+        cutoffs = []
+
+        for area, vacancies in self.vacancies.items():
+            ranked = self.ranked(area)
+            area_admitted = ranked[:vacancies]
+            area_waitlist = ranked[vacancies:]
+
+            for position, result in enumerate(area_admitted, start=1):
+                admitted.append({**result, 'orden_merito': position})
+            for position, result in enumerate(area_waitlist, start=len(area_admitted) + 1):
+                waitlist.append({**result, 'orden_merito': position})
+
+            cutoffs.append({
+                'area_postulada': area,
+                'vacantes': vacancies,
+                'postulantes': self.seen[area],
+                'admitidos': len(area_admitted),
+                # Without enough applicants to fill the vacancies there is no cut-off
+                'puntaje_corte': area_admitted[-1][self.score_column] if len(area_admitted) == vacancies and area_admitted else None
+            })
+
+        return admitted, waitlist, cutoffs
+
+def select_admissions(detailed_results, vacancies=None, waitlist_size=WAITLIST_SIZE, score_column='puntaje_total'):
+    """Run the admission selection over an iterable of detailed result rows"""
+    selector = AdmissionSelector(vacancies, waitlist_size, score_column)
+    for result in detailed_results:
+        selector.add(result)
+    return selector
+
+def save_admission_results(selector, output_dir):
+    """Write admitidos.csv, lista_espera.csv and puntajes_corte.csv"""
+    admitted, waitlist, cutoffs = selector.results()
+
+    os.makedirs(output_dir, exist_ok=True)
+    admitted_path = os.path.join(output_dir, "admitidos.csv")
+    waitlist_path = os.path.join(output_dir, "lista_espera.csv")
+    cutoffs_path = os.path.join(output_dir, "puntajes_corte.csv")
+
+    pd.DataFrame(admitted).to_csv(admitted_path, index=False)
+    pd.DataFrame(waitlist).to_csv(waitlist_path, index=False)
+    pd.DataFrame(cutoffs).to_csv(cutoffs_path, index=False)
+
+    print(f"Admitted list saved to {admitted_path}")
+    print(f"Waitlist saved to {waitlist_path}")
+    print(f"Cut-off scores saved to {cutoffs_path}")
+
+    for cutoff in cutoffs:
+        print(f"{cutoff['area_postulada']}: {cutoff['admitidos']}/{cutoff['vacantes']} admitted, cut-off {cutoff['puntaje_corte']}")
+
+    return admitted_path, waitlist_path, cutoffs_path
+
+def merit_order(areas, careers, totals, section_scores, codes):
+    """
+    Vectorized merit_key: indices that sort applicants by area, puntaje_total,
+    section scores in the career's tie-break order and then the lowest LITHO.
+    section_scores is (n, sections) in EXAM_STRUCTURE order
+    """
+    areas = np.asarray(areas)
+    if areas.dtype.kind not in 'iu':
+        _, areas = np.unique(areas, return_inverse=True)
+    careers = np.asarray(careers)
+    section_names = list(SECTION_COLUMNS)
+
+    # Section scores of every applicant rearranged into its career's tie-break order
+    tie_order = np.zeros((len(careers), len(section_names)), dtype=np.int64)
+    for career, sections in TIE_BREAK_SECTIONS.items():
+        tie_order[careers == career] = [section_names.index(section) for section in sections]
+    tie_scores = np.take_along_axis(np.asarray(section_scores, dtype=float), tie_order, axis=1)
+
+    # np.lexsort uses the last key as the primary one
+    _, code_rank = np.unique(np.asarray(codes), return_inverse=True)
+    keys = [code_rank] + [-tie_scores[:, k] for k in range(tie_scores.shape[1] - 1, -1, -1)] + [-np.asarray(totals, dtype=float), areas]
+    return np.lexsort(keys)
+
+def rank_applicants(areas, careers, totals, section_scores, codes):
+    """
+    Vectorized ranking with the same order as AdmissionSelector (see
+    merit_order). areas and codes may already be integer codes, which is
+    faster when the same cohort is ranked repeatedly.
+    Returns the 1-based merit position of every applicant within its area
+    """
+    _, areas = np.unique(np.asarray(areas), return_inverse=True)
+    order = merit_order(areas, careers, totals, section_scores, codes)
+
+    # Position within the area: index in the sorted order minus the area's first index
+    sorted_areas = areas[order]
+    area_start = np.r_[0, np.flatnonzero(sorted_areas[1:] != sorted_areas[:-1]) + 1]
+    starts = np.repeat(area_start, np.diff(np.r_[area_start, len(order)]))
+    ranks = np.empty(len(order), dtype=np.int64)
+    ranks[order] = np.arange(len(order)) - starts + 1
+    return ranks
@@ -0,0 +1,171 @@
+import os
+import numpy as np
+
+from config import NUM_QUESTIONS, ANSWER_OPTIONS
+from data_loader import load_answer_keys_from_dbf
+from response_matrix import answer_keys_to_matrix, decode_answers
+
+# Bumped whenever the compiled key table layout or the validation rules change
+KEY_TABLE_VERSION = 2
+# The only cells a key may hold; lowercase letters and other marks are not options
+KEY_OPTIONS = frozenset(ANSWER_OPTIONS)
+
+class AnswerKeyTable:
+    """
+    Validated answer keys as a key matrix.
+
+    key_matrix holds one row of answer codes per TEMA (in key_temas order);
+    by_code maps the code point of a TEMA letter straight to its key row, so
+    looking up a key is a single array index.
+    """
+
+    def __init__(self, key_temas, key_matrix):
+        self.key_temas = np.asarray(key_temas, dtype='U1')
+        self.key_matrix = np.asarray(key_matrix, dtype=np.uint8)
+        self.by_code = np.full(128, -1, dtype=np.int64)
+        for row, tema in enumerate(self.key_temas):
+            self.by_code[ord(tema)] = row
+
+    def __contains__(self, tema):
+        return len(tema) == 1 and ord(tema) < 128 and self.by_code[ord(tema)] >= 0
+
+    def __len__(self):
+        return len(self.key_temas)
+
+    def row(self, tema):
+        """Key row for a TEMA (None if there is no key for it)"""
+        if tema not in self:
+            return None
+        return self.key_matrix[self.by_code[ord(tema)]]
+
+    def as_dict(self):
+        """Answer keys in the TEMA -> list of answers form used by calculate_score"""
+        answers = decode_answers(self.key_matrix)
+        return {str(tema): answers[row].tolist() for row, tema in enumerate(self.key_temas)}
+
+def validate_answer_keys(answer_keys):
+    """
+    Check answer keys against the exam layout.
+    Returns (errors, warnings); a key with errors cannot be used for grading.
+    Blank and invalid cells are only warnings: see usable_key_answers
+    """
+    errors = {}
+    warnings = []
+    for tema, answers in answer_keys.items():
+        problems = []
+        if len(tema) != 1 or ord(tema) >= 128:
+            problems.append(f"TEMA must be a single letter, got '{tema}'")
+        if len(answers) != NUM_QUESTIONS:
+            problems.append(f"expected {NUM_QUESTIONS} answers, got {len(answers)}")
+        if problems:
+            errors[tema] = problems
+            continue
+
+        blank = [i + 1 for i, answer in enumerate(answers) if not (answer or '').strip()]
+        if blank:
+            warnings.append(f"Answer key {tema} has no answer for questions {blank} (never counted as correct)")
+        invalid = [i + 1 for i, answer in enumerate(answers) if (answer or '').strip() and answer not in KEY_OPTIONS]
+        if invalid:
+            warnings.append(f"Answer key {tema} has invalid options at questions {invalid} (never counted as correct)")
+    return errors, warnings
+
+def usable_key_answers(answers):
+    """Key answers with every cell that is not one of the options A-E blanked, so it never counts as correct"""
+    return [answer if answer in KEY_OPTIONS else '' for answer in answers]
+
+def load_answer_keys_from_text(keys_path):
+    """
+    Load answer keys from the generator's keys.txt: one line per exam type,
+    the TEMA letter followed by one letter per question
+    """
+    answer_keys = {}
+    try:
+        with open(keys_path, encoding='utf-8') as f:
+            for line_number, line in enumerate(f, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                tema, answers = line[0], list(line[1:])
+                if tema in answer_keys:
+                    print(f"Warning: Duplicate answer key for exam type {tema} at line {line_number}, keeping the last one")
+                answer_keys[tema] = answers
+    except Exception as e:
+        print(f"Error loading answer keys from {keys_path}: {e}")
+        return {}
+    return answer_keys
+
+def _source_signature(source_path):
+    stat = os.stat(source_path)
+    return np.array([KEY_TABLE_VERSION, stat.st_size, stat.st_mtime_ns], dtype=np.int64)
+
+def compiled_key_path(source_path):
+    """Path of the compiled key table cached next to a keys source file"""
+    return os.path.splitext(source_path)[0] + ".compiled.npz"
+
+def save_answer_key_table(table, path, signature=None):
+    """Save a compiled key table (.npz)"""
+    np.savez(
+        path,
+        key_temas=table.key_temas,
+        key_matrix=table.key_matrix,
+        signature=np.zeros(3, dtype=np.int64) if signature is None else signature
+    )
+
+def load_compiled_key_table(path, signature=None):
+    """
+    Load a compiled key table. When a source signature is given, the table is
+    only returned if it was compiled from that exact source file
+    """
+    try:
+        with np.load(path) as data:
+            if signature is not None and not np.array_equal(data['signature'], signature):
+                return None
+            return AnswerKeyTable(data['key_temas'], data['key_matrix'])
+    except Exception as e:
+        print(f"Error loading compiled answer keys from {path}: {e}")
+        return None
+
+def load_answer_key_table(keys_path, use_cache=True):
+    """
+    Load answer keys from CLAVES.DBF, the generator's keys.txt or a compiled
+    .npz key table. Keys read from a DBF or text file are validated once and
+    cached as a compiled table next to the source; later runs load the
+    cached matrix directly while the source file is unchanged.
+    """
+    if keys_path.lower().endswith('.npz'):
+        table = load_compiled_key_table(keys_path)
+        return table if table is not None else AnswerKeyTable(*answer_keys_to_matrix({}))
+
+    # A missing source is reported by its loader below and never cached
+    use_cache = use_cache and os.path.exists(keys_path)
+    cache_path = compiled_key_path(keys_path)
+    signature = _source_signature(keys_path) if use_cache else None
+    if use_cache and os.path.exists(cache_path):
+        table = load_compiled_key_table(cache_path, signature)
+        if table is not None:
+            print(f"Loaded {len(table)} compiled answer keys from {cache_path}")
+            return table
+
+    if keys_path.lower().endswith('.dbf'):
+        answer_keys = load_answer_keys_from_dbf(keys_path)
+    else:
+        answer_keys = load_answer_keys_from_text(keys_path)
+
+    errors, warnings = validate_answer_keys(answer_keys)
+    for warning in warnings:
+        print(f"Warning: {warning}")
+    for tema, problems in errors.items():
+        print(f"Error: Answer key {tema} rejected: {'; '.join(problems)}")
+
+    valid_keys = {tema: usable_key_answers(answers) for tema, answers in answer_keys.items() if tema not in errors}
+    table = AnswerKeyTable(*answer_keys_to_matrix(valid_keys))
+
+    # A source that yields no usable key is never cached, so fixing it takes effect on the next run
+    if use_cache and len(table):
+        try:
+            save_answer_key_table(table, cache_path, signature)
+            print(f"Compiled answer keys cached at {cache_path}")
+        except OSError as e:
+            print(f"Warning: Could not cache compiled answer keys: {e}")
+
+    return table
@@ -0,0 +1,263 @@
+import os
+import io
+import csv
+import json
+import zlib
+import struct
+import argparse
+
+import numpy as np
+
+from config import NUM_QUESTIONS
+from response_matrix import load_response_matrix, decode_answers
+from answer_keys import AnswerKeyTable, load_answer_key_table
+from data_loader import get_career_path_for_exam_type, load_student_identifications
+from pipeline import score_chunk, RESULT_COLUMNS, DETAILED_COLUMNS
+
+# File layout:
+#   MAGIC, version (uint32)
+#   blocks: zlib(packed responses | TEMA bytes | LITHO bytes), each independently decodable
+#   index: JSON header, key matrix, block offsets/lengths, sorted LITHOs with their block and row
+#   footer: index offset (uint64), MAGIC
+MAGIC = b'LGADMARC'
+ARCHIVE_VERSION = 1
+BITS_PER_ANSWER = 3
+PACKED_WIDTH = (NUM_QUESTIONS * BITS_PER_ANSWER + 7) // 8
+_FOOTER = struct.Struct('<Q8s')
+_BIT_WEIGHTS = np.array([4, 2, 1], dtype=np.uint8)
+
+def pack_responses(responses):
+    """Pack an (n, 100) answer code matrix into 3 bits per answer (38 bytes per sheet)"""
+    bits = (responses[:, :, None] >> np.array([2, 1, 0], dtype=np.uint8)) & 1
+    return np.packbits(bits.reshape(len(responses), -1), axis=1)
+
+def unpack_responses(packed):
+    """Inverse of pack_responses"""
+    bits = np.unpackbits(packed, axis=1)[:, :NUM_QUESTIONS * BITS_PER_ANSWER]
+    return (bits.reshape(len(packed), NUM_QUESTIONS, BITS_PER_ANSWER) * _BIT_WEIGHTS).sum(axis=2).astype(np.uint8)
+
+def _encode_block(lithos, temas, responses, litho_width):
+    payload = (
+        pack_responses(responses).tobytes()
+        + np.asarray(temas, dtype='S1').tobytes()
+        + np.asarray(lithos, dtype=f'S{litho_width}').tobytes()
+    )
+    return zlib.compress(payload, 6)
+
+def _decode_block(data, rows, litho_width, row=None):
+    payload = zlib.decompress(data)
+    if row is not None:
+        # One sheet only: skip unpacking the rest of the block
+        packed = np.frombuffer(payload, dtype=np.uint8, count=PACKED_WIDTH, offset=row * PACKED_WIDTH).reshape(1, PACKED_WIDTH)
+        tema = np.frombuffer(payload, dtype='S1', count=1, offset=rows * PACKED_WIDTH + row).astype(str)[0]
+        return tema, unpack_responses(packed)[0]
+    packed_size = rows * PACKED_WIDTH
+    packed = np.frombuffer(payload, dtype=np.uint8, count=packed_size).reshape(rows, PACKED_WIDTH)
+    temas = np.frombuffer(payload, dtype='S1', count=rows, offset=packed_size)
+    lithos = np.frombuffer(payload, dtype=f'S{litho_width}', count=rows, offset=packed_size + rows)
+    return lithos.astype(str), temas.astype(str), unpack_responses(packed)
+
+def write_archive(archive_path, lithos, temas, responses, key_table, label='', block_size=4096):
+    """
+    Write the answer sheets and keys of one sitting to a compressed archive.
+    Sheets are stored in blocks of block_size that can be decoded on their
+    own, with a LITHO -> (block, row) index for random access
+    """
+    lithos = np.asarray(lithos, dtype=str)
+    litho_width = max(1, max((len(litho.encode('latin-1', 'replace')) for litho in lithos), default=1))
+    block_offsets = []
+    block_lengths = []
+    block_rows = []
+
+    with open(archive_path, 'wb') as f:
+        f.write(MAGIC + struct.pack('<I', ARCHIVE_VERSION))
+        for start in range(0, len(lithos), block_size):
+            stop = start + block_size
+            data = _encode_block(lithos[start:stop], temas[start:stop], responses[start:stop], litho_width)
+            block_offsets.append(f.tell())
+            block_lengths.append(len(data))
+            block_rows.append(min(stop, len(lithos)) - start)
+            f.write(data)
+
+        # Index: LITHOs sorted for binary search, pointing at their block and row
+        order = np.argsort(lithos, kind='stable')
+        sheet_blocks = (order // block_size).astype(np.uint32)
+        sheet_rows = (order % block_size).astype(np.uint32)
+        header = {
+            'version': ARCHIVE_VERSION,
+            'label': label,
+            'sheets': int(len(lithos)),
+            'block_size': block_size,
+            'blocks': len(block_offsets),
+            'litho_width': litho_width,
+            'key_temas': [str(tema) for tema in key_table.key_temas]
+        }
+
+        index_offset = f.tell()
+        header_bytes = json.dumps(header).encode('utf-8')
+        f.write(struct.pack('<I', len(header_bytes)) + header_bytes)
+        f.write(key_table.key_matrix.astype(np.uint8).tobytes())
+        f.write(np.array(block_offsets, dtype=np.uint64).tobytes())
+        f.write(np.array(block_lengths, dtype=np.uint32).tobytes())
+        f.write(np.array(block_rows, dtype=np.uint32).tobytes())
+        f.write(lithos[order].astype(f'S{litho_width}').tobytes())
+        f.write(sheet_blocks.tobytes())
+        f.write(sheet_rows.tobytes())
+        f.write(_FOOTER.pack(index_offset, MAGIC))
+
+    print(f"Archived {len(lithos)} answer sheets in {len(block_offsets)} blocks to {archive_path} ({os.path.getsize(archive_path)} bytes)")
+    return archive_path
+
+class ResponseArchive:
+    """
+    Read access to an answer sheet archive. The index is loaded once on
+    open; a single sheet is then one binary search plus one block read and
+    decompression, and the whole archive can be streamed block by block
+    """
+
+    def __init__(self, archive_path):
+        self.archive_path = archive_path
+        self.file = open(archive_path, 'rb')
+        if self.file.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{archive_path} is not an answer sheet archive")
+
+        self.file.seek(-_FOOTER.size, io.SEEK_END)
+        index_offset, magic = _FOOTER.unpack(self.file.read(_FOOTER.size))
+        if magic != MAGIC:
+            raise ValueError(f"{archive_path} is truncated")
+
+        self.file.seek(index_offset)
+        index = self.file.read()
+        header_length = struct.unpack_from('<I', index)[0]
+        self.header = json.loads(index[4:4 + header_length].decode('utf-8'))
+
+        num_blocks = self.header['blocks']
+        num_sheets = self.header['sheets']
+        width = self.header['litho_width']
+        key_temas = self.header['key_temas']
+
+        position = 4 + header_length
+        def take(dtype, count, shape=None):
+            nonlocal position
+            array = np.frombuffer(index, dtype=dtype, count=count, offset=position)
+            position += array.nbytes
+            return array if shape is None else array.reshape(shape)
+
+        key_matrix = take(np.uint8, len(key_temas) * NUM_QUESTIONS, (len(key_temas), NUM_QUESTIONS))
+        self.key_table = AnswerKeyTable(key_temas, key_matrix)
+        self.block_offsets = take(np.uint64, num_blocks)
+        self.block_lengths = take(np.uint32, num_blocks)
+        self.block_rows = take(np.uint32, num_blocks)
+        self.sorted_lithos = take(f'S{width}', num_sheets)
+        self.sheet_blocks = take(np.uint32, num_sheets)
+        self.sheet_rows = take(np.uint32, num_sheets)
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.header['sheets']
+
+    def _read_compressed(self, block):
+        self.file.seek(int(self.block_offsets[block]))
+        return self.file.read(int(self.block_lengths[block]))
+
+    def read_block(self, block):
+        """Decode one block: (lithos, temas, responses)"""
+        return _decode_block(self._read_compressed(block), int(self.block_rows[block]), self.header['litho_width'])
+
+    def iter_blocks(self):
+        """Stream every block in original sheet order"""
+        for block in range(self.header['blocks']):
+            yield self.read_block(block)
+
+    def find(self, litho):
+        """Return (tema, answers) of one sheet, or None if the LITHO is not archived"""
+        key = str(litho).encode('latin-1', 'replace')
+        position = np.searchsorted(self.sorted_lithos, key)
+        if position >= len(self.sorted_lithos) or self.sorted_lithos[position] != key:
+            return None
+        block = int(self.sheet_blocks[position])
+        tema, answers = _decode_block(self._read_compressed(block), int(self.block_rows[block]),
+                                      self.header['litho_width'], int(self.sheet_rows[position]))
+        return tema, decode_answers(answers).tolist()
+
+def regrade_archive(archive_path, output_path, identifi_path=None):
+    """
+    Re-grade an archived sitting by streaming its blocks straight into the
+    vectorized scorer, with the keys stored in the archive
+    """
+    student_ids = load_student_identifications(identifi_path) if identifi_path else {}
+    detailed_path = os.path.join(os.path.dirname(output_path), "resultados_detallados.csv")
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+
+    with ResponseArchive(archive_path) as archive, \
+            open(output_path, 'w', newline='', encoding='utf-8') as results_file, \
+            open(detailed_path, 'w', newline='', encoding='utf-8') as detailed_file:
+        career_by_tema = {tema: get_career_path_for_exam_type(tema) for tema in archive.key_table.key_temas}
+        csv.writer(results_file, lineterminator='\n').writerow(RESULT_COLUMNS)
+        csv.writer(detailed_file, lineterminator='\n').writerow(DETAILED_COLUMNS)
+
+        graded = 0
+        for lithos, temas, responses in archive.iter_blocks():
+            results, detailed, _, _ = score_chunk(lithos.astype(object), temas, responses, archive.key_table, career_by_tema)
+            results.insert(1, 'dni_estudiante', [student_ids.get(code, '') for code in results['codigo_estudiante']])
+            results.to_csv(results_file, header=False, index=False)
+            if detailed is not None:
+                detailed.insert(1, 'dni_estudiante', [student_ids.get(code, '') for code in detailed['codigo_estudiante']])
+                detailed.to_csv(detailed_file, header=False, index=False)
+                graded += len(detailed)
+
+    print(f"Re-graded {graded} archived exams into {output_path}")
+    return output_path
+
+def main():
+    parser = argparse.ArgumentParser(description="Answer sheet archives: build, look up a sheet or re-grade a sitting")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build = subparsers.add_parser('build', help="archive RESPUEST.DBF and the answer keys")
+    build.add_argument('archive')
+    build.add_argument('--respuestas', help="default: data/RESPUEST.DBF")
+    build.add_argument('--claves', help="default: data/CLAVES.DBF")
+    build.add_argument('--label', default='', help="e.g. the year or sitting")
+    build.add_argument('--block-size', type=int, default=4096)
+
+    show = subparsers.add_parser('show', help="print one archived answer sheet")
+    show.add_argument('archive')
+    show.add_argument('litho')
+
+    regrade = subparsers.add_parser('regrade', help="grade an archived sitting again")
+    regrade.add_argument('archive')
+    regrade.add_argument('--output', help="results CSV (default: output/regrade/resultados.csv, apart from the official results)")
+    regrade.add_argument('--identifi', help="IDENTIFI.DBF to fill in the DNIs")
+
+    args = parser.parse_args()
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+
+    if args.command == 'build':
+        respuestas_path = args.respuestas or os.path.join(script_dir, "data", "RESPUEST.DBF")
+        claves_path = args.claves or os.path.join(script_dir, "data", "CLAVES.DBF")
+        lithos, temas, responses = load_response_matrix(respuestas_path)
+        write_archive(args.archive, lithos, temas, responses, load_answer_key_table(claves_path), args.label, args.block_size)
+    elif args.command == 'show':
+        with ResponseArchive(args.archive) as archive:
+            sheet = archive.find(args.litho)
+        if sheet is None:
+            print(f"LITHO {args.litho} not found in {args.archive}")
+        else:
+            tema, answers = sheet
+            print(f"LITHO {args.litho} TEMA {tema}")
+            print(''.join(answer or '-' for answer in answers))
+    else:
+        # Never default to the grader's own output: a verification run must not replace the official results
+        output_path = args.output or os.path.join(script_dir, "output", "regrade", "resultados.csv")
+        regrade_archive(args.archive, output_path, args.identifi)
+
+if __name__ == "__main__":
+    main()
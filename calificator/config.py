@@ -22,9 +22,76 @@ EXAM_STRUCTURE = {
     }
 }
 
+# Fraction of a correct answer discounted for every wrong answer
+WRONG_ANSWER_PENALTY = 0.25
+
 # Career paths
 CAREER_PATHS = {
     "A": "Ciencias",  # Science
     "B": "Humanidades",  # Humanities
     "C": "Ingeniería"  # Engineering
 }
+
+# Admission vacancies per career area (area_postulada)
+VACANCIES = {
+    "Ciencias": 40,
+    "Humanidades": 40,
+    "Ingeniería": 40
+}
+
+# Number of applicants kept on the waitlist after the last admitted one
+WAITLIST_SIZE = 10
+
+# Section order used to break ties on puntaje_total, per career path
+# (heaviest weighted section first); remaining ties go to the lowest LITHO
+TIE_BREAK_SECTIONS = {
+    "A": ["Ciencias Naturales", "Aptitud Académica", "Matemática", "Humanidades"],
+    "B": ["Humanidades", "Aptitud Académica", "Matemática", "Ciencias Naturales"],
+    "C": ["Matemática", "Aptitud Académica", "Ciencias Naturales", "Humanidades"]
+}
+
+# Columns of resultados_detallados.csv holding each section score
+SECTION_COLUMNS = {
+    "Matemática": "puntaje_matematica",
+    "Ciencias Naturales": "puntaje_ciencias",
+    "Humanidades": "puntaje_humanidades",
+    "Aptitud Académica": "puntaje_aptitud"
+}
+
+# Answer sheet layout
+NUM_QUESTIONS = 100
+ANSWER_OPTIONS = "ABCDE"
+
+# Numeric codes used in response and key matrices: 0 is a blank answer,
+# 1-5 are the options A-E and 6 is any other mark (e.g. '*' for a double mark)
+BLANK_CODE = 0
+INVALID_CODE = len(ANSWER_OPTIONS) + 1
+NUM_CODES = INVALID_CODE + 1
+
+# Copy detection: MinHash signatures over the wrong answers of every sheet,
+# split into LSH bands (num_hashes must be a multiple of bands). A pair with
+# Jaccard similarity J becomes a candidate with probability
+# 1 - (1 - J^rows)^bands; 35 bands of 4 rows put the steep part of that curve
+# near (1/35)^(1/4) = 0.41, so pairs at min_similarity are found about 99% of
+# the time and the exact comparison discards the extra candidates. Sheets with
+# fewer than min_wrong wrong answers carry too little signal to compare, and
+# pairs are reported once they share at least min_shared_wrong wrong answers
+# and that is at least min_similarity of their combined wrong answers (Jaccard)
+COPY_DETECTION = {
+    "num_hashes": 140,
+    "bands": 35,
+    "min_wrong": 5,
+    "min_shared_wrong": 8,
+    "min_similarity": 0.6,
+    "max_bucket_size": 500,
+    "seed": 2024
+}
+
+# Score equating across exam types before ranking: None (raw puntaje_total),
+# "mean_sigma" or "equipercentile". Each TEMA is mapped onto the pooled score
+# distribution of its career path
+EQUATING_METHOD = None
+
+# Resolution of the per-TEMA score histograms used by the equating; scores
+# are multiples of 0.25 with the current weights and penalty, so they are exact
+EQUATING_BIN_WIDTH = 0.05
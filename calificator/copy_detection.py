@@ -0,0 +1,129 @@
+import os
+import numpy as np
+import pandas as pd
+
+from config import NUM_QUESTIONS, NUM_CODES, BLANK_CODE, COPY_DETECTION
+from response_matrix import tema_rows, correct_matrix
+from lsh import lsh_candidate_pairs
+
+# Token of a position that is not a wrong answer; its hash is always the maximum
+_NO_TOKEN = NUM_QUESTIONS * NUM_CODES
+
+def wrong_answer_tokens(responses, keys):
+    """
+    Token matrix of the wrong answers: position * NUM_CODES + option for every
+    answered but incorrect question, _NO_TOKEN everywhere else. Two sheets
+    share a token only when they chose the same wrong option on the same question
+    """
+    wrong = (responses != BLANK_CODE) & ~correct_matrix(responses, keys)
+    tokens = np.arange(NUM_QUESTIONS) * NUM_CODES + responses.astype(np.int64)
+    return np.where(wrong, tokens, _NO_TOKEN), wrong
+
+def minhash_signatures(tokens, num_hashes, seed, chunk_size=8192):
+    """
+    MinHash signature of every sheet's wrong-answer token set.
+    The token domain is tiny (question x option), so every hash function is a
+    random table over it and the signature is a running minimum over positions
+    """
+    rng = np.random.default_rng(seed)
+    max_hash = np.iinfo(np.uint32).max
+    table = rng.integers(0, max_hash, size=(_NO_TOKEN + 1, num_hashes), dtype=np.uint32)
+    table[_NO_TOKEN] = max_hash
+
+    signatures = np.empty((len(tokens), num_hashes), dtype=np.uint32)
+    for start in range(0, len(tokens), chunk_size):
+        chunk = tokens[start:start + chunk_size]
+        signature = np.full((len(chunk), num_hashes), max_hash, dtype=np.uint32)
+        for position in range(NUM_QUESTIONS):
+            np.minimum(signature, table[chunk[:, position]], out=signature)
+        signatures[start:start + chunk_size] = signature
+    return signatures
+
+def compare_pairs(responses, wrong, first, second, chunk_size=200000):
+    """
+    Full comparison of candidate pairs: identical answers, identical wrong
+    answers and Hamming distance between the two sheets
+    """
+    identical = np.empty(len(first), dtype=np.int64)
+    shared_wrong = np.empty(len(first), dtype=np.int64)
+    for start in range(0, len(first), chunk_size):
+        a = first[start:start + chunk_size]
+        b = second[start:start + chunk_size]
+        same = responses[a] == responses[b]
+        identical[start:start + chunk_size] = (same & (responses[a] != BLANK_CODE)).sum(axis=1)
+        shared_wrong[start:start + chunk_size] = (same & wrong[a] & wrong[b]).sum(axis=1)
+    hamming = NUM_QUESTIONS - identical - ((responses[first] == BLANK_CODE) & (responses[second] == BLANK_CODE)).sum(axis=1)
+    return identical, shared_wrong, hamming
+
+def detect_similar_sheets(lithos, temas, responses, key_temas, key_matrix, rooms=None, settings=None):
+    """
+    Rank suspiciously similar answer sheets.
+
+    Sheets are blocked by exam room and TEMA, hashed by their wrong answers
+    (MinHash + LSH) and only the LSH candidate pairs are compared in full.
+    Returns a DataFrame of suspect pairs, most identical wrong answers first.
+    """
+    settings = {**COPY_DETECTION, **(settings or {})}
+    rooms = rooms or {}
+    lithos = np.asarray(lithos)
+    key_rows = tema_rows(temas, key_temas)
+    sheet_rooms = np.array([rooms.get(litho, '') for litho in lithos], dtype=object)
+
+    suspects = []
+    graded = key_rows >= 0
+    blocks = pd.DataFrame({'room': sheet_rooms[graded], 'tema': np.asarray(temas)[graded], 'sheet': np.flatnonzero(graded)})
+    for (room, tema), block in blocks.groupby(['room', 'tema'], sort=True):
+        sheets = block['sheet'].to_numpy()
+        block_responses = responses[sheets]
+        tokens, wrong = wrong_answer_tokens(block_responses, key_matrix[key_rows[sheets]])
+
+        # Sheets with almost no wrong answers cannot be told apart from honest ones
+        num_wrong = wrong.sum(axis=1)
+        eligible = np.flatnonzero(num_wrong >= settings['min_wrong'])
+        if len(eligible) < 2:
+            continue
+
+        signatures = minhash_signatures(tokens[eligible], settings['num_hashes'], settings['seed'])
+        first, second = lsh_candidate_pairs(signatures, settings['bands'], settings['max_bucket_size'], unit='sheets')
+        if len(first) == 0:
+            continue
+        first, second = eligible[first], eligible[second]
+
+        identical, shared_wrong, hamming = compare_pairs(block_responses, wrong, first, second)
+        union = num_wrong[first] + num_wrong[second] - shared_wrong
+        similarity = shared_wrong / union
+        flagged = (shared_wrong >= settings['min_shared_wrong']) & (similarity >= settings['min_similarity'])
+        if not flagged.any():
+            continue
+
+        first, second = first[flagged], second[flagged]
+        shared_wrong = shared_wrong[flagged]
+        suspects.append(pd.DataFrame({
+            'aula': room,
+            'tema': tema,
+            'codigo_1': lithos[sheets[first]],
+            'codigo_2': lithos[sheets[second]],
+            'errores_1': num_wrong[first],
+            'errores_2': num_wrong[second],
+            'errores_identicos': shared_wrong,
+            'similitud_errores': np.round(similarity[flagged], 4),
+            'respuestas_identicas': identical[flagged],
+            'distancia_hamming': hamming[flagged]
+        }))
+
+    columns = ['aula', 'tema', 'codigo_1', 'codigo_2', 'errores_1', 'errores_2', 'errores_identicos', 'similitud_errores', 'respuestas_identicas', 'distancia_hamming']
+    if not suspects:
+        return pd.DataFrame(columns=columns)
+    return pd.concat(suspects, ignore_index=True).sort_values(
+        by=['errores_identicos', 'similitud_errores', 'codigo_1', 'codigo_2'],
+        ascending=[False, False, True, True]
+    ).reset_index(drop=True)
+
+def save_suspect_pairs(suspects_df, output_dir):
+    """Write copias_sospechosas.csv"""
+    os.makedirs(output_dir, exist_ok=True)
+    suspects_path = os.path.join(output_dir, "copias_sospechosas.csv")
+    suspects_df.to_csv(suspects_path, index=False)
+    print(f"Found {len(suspects_df)} suspect answer sheet pairs")
+    print(f"Suspect pairs saved to {suspects_path}")
+    return suspects_path
@@ -32,19 +32,13 @@ def load_answer_keys_from_dbf(claves_path):
         # Create a dictionary to store the answer keys
         answer_keys = {}
         
-        for _, row in claves_df.iterrows():
-            exam_type = row.get('TEMA', '')
+        # Read the question columns in one go instead of row by row
+        question_columns = [f'PREG_{i:03d}' for i in range(1, 101)]
+        answers_matrix = claves_df.reindex(columns=question_columns).fillna('').to_numpy(dtype=object)
+        
+        for exam_type, answers in zip(claves_df.get('TEMA', []), answers_matrix):
             if exam_type:
-                # Extract answers from the row
-                answers = []
-                for i in range(1, 101):
-                    field_name = f'PREG_{i:03d}'
-                    if field_name in row and row[field_name]:
-                        answers.append(row[field_name])
-                    else:
-                        answers.append('')
-                
-                answer_keys[exam_type] = answers
+                answer_keys[exam_type] = [answer if answer else '' for answer in answers]
         
         return answer_keys
     except Exception as e:
@@ -76,6 +70,22 @@ def load_student_identifications(identifi_path):
         print(f"Error loading student identifications from {identifi_path}: {e}")
         return {}
 
+def load_student_rooms(identifi_path):
+    """
+    Load the exam room of every student from IDENTIFI.DBF
+    Returns a dictionary mapping student codes to their AULA_EXAM
+    """
+    try:
+        identifi_df = load_dbf_to_dataframe(identifi_path)
+        if 'AULA_EXAM' not in identifi_df.columns:
+            return {}
+        
+        rooms = identifi_df[['LITHO', 'AULA_EXAM']].fillna('')
+        return {code: str(room).strip() for code, room in zip(rooms['LITHO'], rooms['AULA_EXAM']) if code}
+    except Exception as e:
+        print(f"Error loading student rooms from {identifi_path}: {e}")
+        return {}
+
 def get_career_path_for_exam_type(exam_type):
     """Get the career path for a given exam type"""
     # Ciencias (A)
@@ -0,0 +1,153 @@
+import os
+import numpy as np
+import pandas as pd
+
+from config import EXAM_STRUCTURE, CAREER_PATHS, EQUATING_BIN_WIDTH
+
+def max_career_score():
+    """Highest puntaje_total any career path can reach"""
+    return max(
+        sum(details["weights"][path] * (details["end"] - details["start"] + 1) for details in EXAM_STRUCTURE.values())
+        for path in CAREER_PATHS
+    )
+
+class ScoreSketch:
+    """
+    Streaming score distribution: a fixed-width histogram over [0, max score]
+    plus the first two moments. Memory does not depend on the number of
+    scores, sketches of different chunks can be merged by addition, and
+    quantiles are exact up to the bin width
+    """
+
+    def __init__(self, max_score=None, bin_width=EQUATING_BIN_WIDTH):
+        self.max_score = max_career_score() if max_score is None else max_score
+        self.bin_width = bin_width
+        self.counts = np.zeros(int(np.ceil(self.max_score / bin_width)) + 1, dtype=np.int64)
+        self.n = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+
+    def update(self, scores):
+        scores = np.asarray(scores, dtype=float)
+        bins = np.clip(np.rint(scores / self.bin_width).astype(np.int64), 0, len(self.counts) - 1)
+        self.counts += np.bincount(bins, minlength=len(self.counts))
+        self.n += len(scores)
+        self.total += scores.sum()
+        self.total_sq += (scores ** 2).sum()
+
+    def merge(self, other):
+        self.counts += other.counts
+        self.n += other.n
+        self.total += other.total
+        self.total_sq += other.total_sq
+
+    @property
+    def mean(self):
+        return self.total / self.n if self.n else 0.0
+
+    @property
+    def std(self):
+        return float(np.sqrt(max(self.total_sq / self.n - self.mean ** 2, 0))) if self.n else 0.0
+
+    def values(self):
+        return np.arange(len(self.counts)) * self.bin_width
+
+    def percentile_points(self):
+        """Mid-percentile rank of every occupied score value (continuized distribution)"""
+        occupied = np.flatnonzero(self.counts)
+        below = np.cumsum(self.counts) - self.counts
+        ranks = (below[occupied] + 0.5 * self.counts[occupied]) / self.n
+        return self.values()[occupied], ranks
+
+    def percentile_rank(self, scores):
+        values, ranks = self.percentile_points()
+        return np.interp(scores, values, ranks)
+
+    def quantile(self, ranks):
+        values, points = self.percentile_points()
+        return np.interp(ranks, points, values)
+
+class ScoreEquating:
+    """
+    Equates puntaje_total across exam types (TEMA).
+
+    One sketch is kept per TEMA; the reference scale of a TEMA is the pooled
+    distribution of every TEMA of the same career path, so scores of
+    different exam types of one career become comparable before ranking.
+    Supported methods are "mean_sigma" (linear, matching mean and standard
+    deviation) and "equipercentile" (matching percentile ranks).
+    """
+
+    def __init__(self, method):
+        if method not in ('mean_sigma', 'equipercentile'):
+            raise ValueError(f"Unknown equating method '{method}'")
+        self.method = method
+        self.sketches = {}
+        self.career_by_tema = {}
+
+    def update(self, temas, careers, scores):
+        """Add a chunk of (TEMA, career path, raw score) triples"""
+        temas = np.asarray(temas)
+        careers = np.asarray(careers)
+        scores = np.asarray(scores, dtype=float)
+        for tema in np.unique(temas):
+            in_tema = temas == tema
+            if tema not in self.sketches:
+                self.sketches[tema] = ScoreSketch()
+                self.career_by_tema[tema] = careers[in_tema][0]
+            self.sketches[tema].update(scores[in_tema])
+
+    def reference(self, career):
+        pooled = ScoreSketch()
+        for tema, sketch in self.sketches.items():
+            if self.career_by_tema[tema] == career:
+                pooled.merge(sketch)
+        return pooled
+
+    def transform(self, temas, scores):
+        """Map raw scores onto the common scale of their career path"""
+        temas = np.asarray(temas)
+        scores = np.asarray(scores, dtype=float)
+        equated = scores.copy()
+        references = {career: self.reference(career) for career in set(self.career_by_tema.values())}
+
+        for tema, sketch in self.sketches.items():
+            in_tema = temas == tema
+            if not in_tema.any() or sketch.n == 0:
+                continue
+            reference = references[self.career_by_tema[tema]]
+            if self.method == 'mean_sigma':
+                scale = reference.std / sketch.std if sketch.std > 0 else 1.0
+                equated[in_tema] = reference.mean + scale * (scores[in_tema] - sketch.mean)
+            else:
+                equated[in_tema] = reference.quantile(sketch.percentile_rank(scores[in_tema]))
+
+        return np.round(np.clip(equated, 0, max_career_score()), 4)
+
+    def summary(self):
+        """Per-TEMA raw distribution against its reference scale"""
+        rows = []
+        for tema in sorted(self.sketches):
+            sketch = self.sketches[tema]
+            reference = self.reference(self.career_by_tema[tema])
+            rows.append({
+                'tema': tema,
+                'carrera_asignada': self.career_by_tema[tema],
+                'examinados': sketch.n,
+                'media': round(sketch.mean, 4),
+                'desviacion': round(sketch.std, 4),
+                'mediana': round(float(sketch.quantile(0.5)), 4),
+                'media_referencia': round(reference.mean, 4),
+                'desviacion_referencia': round(reference.std, 4),
+                'mediana_referencia': round(float(reference.quantile(0.5)), 4),
+                'metodo': self.method
+            })
+        return pd.DataFrame(rows)
+
+def save_equating_summary(equating, output_dir):
+    """Write equiparacion.csv"""
+    os.makedirs(output_dir, exist_ok=True)
+    summary_path = os.path.join(output_dir, "equiparacion.csv")
+    equating.summary().to_csv(summary_path, index=False)
+    print(f"Score equating ({equating.method}) summary saved to {summary_path}")
+    return summary_path
@@ -0,0 +1,152 @@
+import os
+import numpy as np
+import pandas as pd
+
+from config import NUM_QUESTIONS, ANSWER_OPTIONS, BLANK_CODE, INVALID_CODE, NUM_CODES
+from response_matrix import tema_rows, correct_matrix
+from shared import GENERATOR_DIR, load_generator_module
+
+def load_generator_layout():
+    """
+    Return the subject and question bank CSV of every exam position, in the
+    order generate_exam writes them (sections and subjects of the generator's
+    EXAM_STRUCTURE). Returns an empty list if the generator config is missing.
+    """
+    config_path = os.path.join(GENERATOR_DIR, "config.py")
+    if not os.path.exists(config_path):
+        print(f"Warning: Generator config not found at {config_path}")
+        return []
+
+    generator_config = load_generator_module("config")
+
+    layout = []
+    for subjects in generator_config.EXAM_STRUCTURE.values():
+        for subject, num_questions in subjects.items():
+            layout.extend([(subject, generator_config.FILE_MAPPING.get(subject, ''))] * num_questions)
+    return layout[:NUM_QUESTIONS]
+
+class ItemAnalysis:
+    """
+    One-pass item analysis per (TEMA, question).
+
+    Only additive statistics are accumulated (option histograms, number of
+    examinees and the first two moments of the number-right score, overall
+    and among those who answered each item correctly), so response matrices
+    can be fed in chunks of any size and the final statistics do not depend
+    on how the cohort was split.
+    """
+
+    def __init__(self, key_temas, key_matrix):
+        self.key_temas = np.asarray(key_temas)
+        self.key_matrix = np.asarray(key_matrix)
+        num_temas = len(self.key_temas)
+
+        self.option_counts = np.zeros((num_temas, NUM_QUESTIONS, NUM_CODES), dtype=np.int64)
+        self.examinees = np.zeros(num_temas, dtype=np.int64)
+        self.score_sum = np.zeros(num_temas)
+        self.score_sq_sum = np.zeros(num_temas)
+        self.correct_score_sum = np.zeros((num_temas, NUM_QUESTIONS))
+
+    def update(self, temas, responses):
+        """Accumulate one chunk of the response matrix"""
+        rows = tema_rows(temas, self.key_temas)
+        graded = rows >= 0
+        rows = rows[graded]
+        responses = responses[graded]
+        if len(rows) == 0:
+            return
+
+        num_temas = len(self.key_temas)
+        correct = correct_matrix(responses, self.key_matrix[rows])
+        scores = correct.sum(axis=1).astype(float)
+
+        # Option histogram for every (TEMA, question) with a single bincount
+        cell = (rows[:, None] * NUM_QUESTIONS + np.arange(NUM_QUESTIONS)) * NUM_CODES + responses
+        self.option_counts += np.bincount(cell.ravel(), minlength=self.option_counts.size).reshape(self.option_counts.shape)
+
+        self.examinees += np.bincount(rows, minlength=num_temas)
+        self.score_sum += np.bincount(rows, weights=scores, minlength=num_temas)
+        self.score_sq_sum += np.bincount(rows, weights=scores ** 2, minlength=num_temas)
+
+        item = rows[:, None] * NUM_QUESTIONS + np.arange(NUM_QUESTIONS)
+        item_scores = np.broadcast_to(scores[:, None], correct.shape)
+        self.correct_score_sum += np.bincount(item[correct], weights=item_scores[correct], minlength=num_temas * NUM_QUESTIONS).reshape(num_temas, NUM_QUESTIONS)
+
+    def statistics(self, layout=None):
+        """
+        Build a DataFrame with one row per (TEMA, question): difficulty
+        (p-value), point-biserial discrimination against the number-right
+        score and the count of every option, blank and invalid mark
+        """
+        n = self.examinees[:, None].astype(float)
+        keys = self.key_matrix
+        correct_counts = np.take_along_axis(self.option_counts, keys[:, :, None].astype(np.int64), axis=2)[:, :, 0]
+        # Questions without a valid key cannot be answered correctly
+        correct_counts = np.where((keys == BLANK_CODE) | (keys == INVALID_CODE), 0, correct_counts)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            p_value = correct_counts / n
+            mean = self.score_sum[:, None] / n
+            std = np.sqrt(np.maximum(self.score_sq_sum[:, None] / n - mean ** 2, 0))
+            mean_correct = self.correct_score_sum / correct_counts
+            # r_pb = (M_correct - M_all) / s * sqrt(p / q)
+            discrimination = (mean_correct - mean) / std * np.sqrt(p_value / (1 - p_value))
+
+        num_temas = len(self.key_temas)
+        stats = {
+            'tema': np.repeat(self.key_temas, NUM_QUESTIONS),
+            'pregunta': np.tile(np.arange(1, NUM_QUESTIONS + 1), num_temas),
+            'clave': np.array([''] + list(ANSWER_OPTIONS) + ['*'])[keys].ravel(),
+            'examinados': np.repeat(self.examinees, NUM_QUESTIONS),
+            'dificultad': np.round(p_value.ravel(), 4),
+            'discriminacion': np.round(discrimination.ravel(), 4)
+        }
+        for code, option in enumerate(ANSWER_OPTIONS, start=1):
+            stats[f'opcion_{option}'] = self.option_counts[:, :, code].ravel()
+        stats['en_blanco'] = self.option_counts[:, :, BLANK_CODE].ravel()
+        stats['invalidas'] = self.option_counts[:, :, INVALID_CODE].ravel()
+
+        stats_df = pd.DataFrame(stats)
+
+        if layout:
+            subjects = [subject for subject, _ in layout] + [''] * (NUM_QUESTIONS - len(layout))
+            files = [filename for _, filename in layout] + [''] * (NUM_QUESTIONS - len(layout))
+            stats_df.insert(2, 'materia', np.tile(subjects, num_temas))
+            stats_df.insert(3, 'archivo', np.tile(files, num_temas))
+
+        return stats_df
+
+def analyze_items(temas, responses, key_temas, key_matrix, manifest=None, chunk_size=100000):
+    """
+    Run the item analysis over a full response matrix, chunk by chunk.
+    Items are mapped to their bank CSV row through the question manifest when
+    one is given, otherwise only to the subject of their position
+    """
+    analysis = ItemAnalysis(key_temas, key_matrix)
+    for start in range(0, len(responses), chunk_size):
+        analysis.update(temas[start:start + chunk_size], responses[start:start + chunk_size])
+    stats_df = analysis.statistics(load_generator_layout())
+    if manifest is not None:
+        stats_df = attach_manifest_items(stats_df, manifest)
+    return stats_df
+
+def attach_manifest_items(stats_df, manifest):
+    """Map every (TEMA, question) of the item statistics to its bank CSV row (fila, -1 if unknown)"""
+    items = manifest.item_table()
+    stats_df = stats_df.merge(items, on=['tema', 'pregunta'], how='left', suffixes=('', '_manifest'))
+    from_manifest = stats_df['fila'].fillna(-1) >= 0
+    for column in ['materia', 'archivo']:
+        # Without a positional layout there is no column clash to resolve
+        if f'{column}_manifest' in stats_df:
+            stats_df[column] = stats_df[column].where(~from_manifest, stats_df[f'{column}_manifest'])
+            stats_df = stats_df.drop(columns=f'{column}_manifest')
+    stats_df['fila'] = stats_df['fila'].fillna(-1).astype(int)
+    return stats_df
+
+def save_item_analysis(stats_df, output_dir):
+    """Write analisis_items.csv"""
+    os.makedirs(output_dir, exist_ok=True)
+    stats_path = os.path.join(output_dir, "analisis_items.csv")
+    stats_df.to_csv(stats_path, index=False)
+    print(f"Item analysis saved to {stats_path}")
+    return stats_path
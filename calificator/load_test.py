@@ -0,0 +1,84 @@
+import os
+import time
+import asyncio
+import argparse
+
+import numpy as np
+
+from results_service import RESULTS_INDEX_FILE, ResultsIndex
+
+async def _client(host, port, dnis, latencies):
+    """One keep-alive connection issuing its requests back to back"""
+    reader, writer = await asyncio.open_connection(host, port)
+    statuses = {}
+    try:
+        for dni in dnis:
+            start = time.perf_counter()
+            writer.write(f"GET /resultado/{dni} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode('latin-1'))
+            await writer.drain()
+            status = int((await reader.readline()).split()[1])
+            length = 0
+            while True:
+                header = await reader.readline()
+                if header in (b'\r\n', b''):
+                    break
+                if header.lower().startswith(b'content-length:'):
+                    length = int(header.split(b':')[1])
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+    finally:
+        writer.close()
+    return statuses
+
+async def run_load_test(host, port, dnis, connections):
+    latencies = []
+    start = time.perf_counter()
+    per_client = await asyncio.gather(*(_client(host, port, chunk, latencies) for chunk in np.array_split(dnis, connections)))
+    elapsed = time.perf_counter() - start
+
+    statuses = {}
+    for client_statuses in per_client:
+        for status, count in client_statuses.items():
+            statuses[status] = statuses.get(status, 0) + count
+    return elapsed, np.array(latencies), statuses
+
+def benchmark_lookups(index, dnis):
+    """In-process lookup time, without HTTP, in microseconds per lookup"""
+    start = time.perf_counter()
+    for dni in dnis:
+        index.lookup(dni)
+    return (time.perf_counter() - start) / len(dnis) * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test for the results lookup service (start results_service.py first)")
+    parser.add_argument('--index', help=f"results index, used to pick DNIs (default: output/{RESULTS_INDEX_FILE})")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--requests', type=int, default=20000)
+    parser.add_argument('--connections', type=int, default=50)
+    parser.add_argument('--missing', type=float, default=0.1, help="fraction of lookups for DNIs that are not in the index")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    index = ResultsIndex(args.index or os.path.join(script_dir, "output", RESULTS_INDEX_FILE))
+    if not len(index):
+        print("Error: The results index is empty")
+        return
+
+    # Applicants looked up at random, plus some DNIs that were never graded
+    rng = np.random.default_rng(args.seed)
+    dnis = index.dnis[rng.integers(0, len(index), args.requests)].astype(str)
+    missing = rng.random(args.requests) < args.missing
+    dnis[missing] = [f"9{number:07d}" for number in rng.integers(0, 10 ** 7, int(missing.sum()))]
+
+    print(f"In-process lookup: {benchmark_lookups(index, dnis):.1f} us per DNI")
+
+    elapsed, latencies, statuses = asyncio.run(run_load_test(args.host, args.port, dnis, args.connections))
+    print(f"{len(latencies)} requests over {args.connections} connections in {elapsed:.2f}s: {len(latencies) / elapsed:.0f} requests/s")
+    print(f"Latency ms: p50 {np.percentile(latencies, 50) * 1000:.2f}, p95 {np.percentile(latencies, 95) * 1000:.2f}, p99 {np.percentile(latencies, 99) * 1000:.2f}")
+    print("Responses: " + ", ".join(f"{status}: {count}" for status, count in sorted(statuses.items())))
+
+if __name__ == "__main__":
+    main()
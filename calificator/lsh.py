@@ -0,0 +1,46 @@
+import numpy as np
+
+# Shared by copy_detection.py and the exam generator's bank_lint.py (which
+# loads this file by path), so it depends on numpy only, not on either config
+
+def lsh_candidate_pairs(signatures, bands, max_bucket_size, unit='items'):
+    """
+    Candidate pairs (i < j) of rows of a MinHash signature matrix that share
+    all signature rows of at least one band. Buckets larger than
+    max_bucket_size are skipped; unit names the rows in that warning
+    """
+    num_rows, num_hashes = signatures.shape
+    rows_per_band = num_hashes // bands
+    pairs = []
+    skipped = 0
+
+    for band in range(bands):
+        band_rows = np.ascontiguousarray(signatures[:, band * rows_per_band:(band + 1) * rows_per_band])
+        band_keys = band_rows.view(np.dtype((np.void, band_rows.dtype.itemsize * rows_per_band))).ravel()
+        _, bucket, counts = np.unique(band_keys, return_inverse=True, return_counts=True)
+
+        bucket_sizes = counts[bucket]
+        skipped += int((counts > max_bucket_size).sum())
+        shared = np.flatnonzero((bucket_sizes > 1) & (bucket_sizes <= max_bucket_size))
+        if len(shared) == 0:
+            continue
+
+        # Rows sorted by bucket (stable, so ascending within a bucket); pairing
+        # every row with the one k places ahead in the same bucket enumerates
+        # all pairs of a bucket without a Python loop over buckets
+        members = shared[np.argsort(bucket[shared], kind='stable')]
+        member_buckets = bucket[members]
+        for k in range(1, int(bucket_sizes[shared].max())):
+            same = member_buckets[k:] == member_buckets[:-k]
+            if not same.any():
+                break
+            pairs.append(members[:-k][same] * num_rows + members[k:][same])
+
+    if skipped:
+        print(f"Warning: Skipped {skipped} LSH buckets larger than {max_bucket_size} {unit}")
+    if not pairs:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+    # Members are ascending within a bucket, so every pair is already (i < j)
+    encoded = np.unique(np.concatenate(pairs))
+    return encoded // num_rows, encoded % num_rows
@@ -1,18 +1,33 @@
 import os
+import argparse
+import numpy as np
 import pandas as pd
 
-from config import CAREER_PATHS
-from data_loader import load_dbf_to_dataframe, extract_answers, load_answer_keys_from_dbf, get_career_path_for_exam_type, load_student_identifications
-from score_calculator import calculate_score
-from report_generator import generate_pdf_report, display_results_table
+from config import CAREER_PATHS, EQUATING_METHOD
+from data_loader import load_dbf_to_dataframe, extract_answers, get_career_path_for_exam_type, load_student_identifications, load_student_rooms
+from score_calculator import calculate_score, count_section_answers
+from report_generator import generate_pdf_report, generate_roster_pdf, display_results_table
+from admission import AdmissionSelector, select_admissions, save_admission_results
+from equating import ScoreEquating, save_equating_summary
+from merge_results import sort_results_for_merge
+from answer_keys import load_answer_key_table
+from item_analysis import analyze_items, save_item_analysis
+from provenance import load_question_manifest, verify_manifest_keys, save_manifest_summaries
+from copy_detection import detect_similar_sheets, save_suspect_pairs
+from pipeline import grade_exams_pipelined
+from scenarios import save_section_counts
+from response_matrix import response_matrix_from_dataframe, tema_rows
+from archive import write_archive
+from results_service import build_results_index
 
-def grade_exams(respuestas_path, claves_path, identifi_path, output_path):
+def grade_exams(respuestas_path, claves_path, identifi_path, output_path, manifest_path=None):
     """Grade the exams and save the results"""
     # Load the student responses
     respuestas_df = load_dbf_to_dataframe(respuestas_path)
     
-    # Load the answer keys from CLAVES.DBF
-    answer_keys = load_answer_keys_from_dbf(claves_path)
+    # Load the answer keys (CLAVES.DBF, the generator's keys.txt or a compiled key table)
+    key_table = load_answer_key_table(claves_path)
+    answer_keys = key_table.as_dict()
     
     # Load student identifications from IDENTIFI.DBF
     student_ids = load_student_identifications(identifi_path)
@@ -22,6 +37,10 @@ def grade_exams(respuestas_path, claves_path, identifi_path, output_path):
     results = []
     detailed_results = []
     
+    # Admission selection is fed row by row while grading, unless scores
+    # have to be equated first (that needs every TEMA's distribution)
+    selector = AdmissionSelector()
+    
     # Process each student's responses
     for idx, row in respuestas_df.iterrows():
         # Get the student code (LITHO field) or generate one if not present
@@ -76,6 +95,8 @@ def grade_exams(respuestas_path, claves_path, identifi_path, output_path):
                 'area_postulada': CAREER_PATHS[career_path],
                 'puntaje_total': best_career
             })
+            if not EQUATING_METHOD:
+                selector.add(detailed_results[-1])
         else:
             print(f"Warning: No answer key found for exam type {exam_type}")
     
@@ -83,10 +104,20 @@ def grade_exams(respuestas_path, claves_path, identifi_path, output_path):
     results_df = pd.DataFrame(results)
     detailed_results_df = pd.DataFrame(detailed_results)
     
+    # Equate scores across exam types and rank on the equated scale
+    if EQUATING_METHOD and not detailed_results_df.empty:
+        equating = ScoreEquating(EQUATING_METHOD)
+        equating.update(detailed_results_df['tipo_examen'], detailed_results_df['carrera_asignada'], detailed_results_df['puntaje_total'])
+        detailed_results_df['puntaje_equiparado'] = equating.transform(detailed_results_df['tipo_examen'], detailed_results_df['puntaje_total'])
+        selector = select_admissions(detailed_results_df.to_dict('records'), score_column='puntaje_equiparado')
+        save_equating_summary(equating, os.path.dirname(output_path))
+    
     # Create output directory if it doesn't exist
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
     
-    # Save the results to CSV files
+    # Save the results to CSV files; detailed results are ordered by career
+    # area and score so site files can be merged directly (merge_results.py)
+    detailed_results_df = sort_results_for_merge(detailed_results_df, 'puntaje_equiparado' if 'puntaje_equiparado' in detailed_results_df else 'puntaje_total')
     results_df.to_csv(output_path, index=False)
     detailed_path = os.path.join(os.path.dirname(output_path), "resultados_detallados.csv")
     detailed_results_df.to_csv(detailed_path, index=False)
@@ -96,6 +127,43 @@ def grade_exams(respuestas_path, claves_path, identifi_path, output_path):
     pdf_path = os.path.join(os.path.dirname(output_path), f"resultados_{timestamp}.pdf")
     generate_pdf_report(results_df, pdf_path, student_ids)
     
+    # Save the admitted list, waitlist and cut-off scores per career area
+    save_admission_results(selector, os.path.dirname(output_path))
+    
+    # Item analysis (difficulty, discrimination, distractors) per TEMA and question
+    lithos, temas, responses = response_matrix_from_dataframe(respuestas_df)
+    key_temas, key_matrix = key_table.key_temas, key_table.key_matrix
+    manifest = load_question_manifest(manifest_path) if manifest_path else None
+    if manifest is not None:
+        # Only TEMAs whose keys match the manifest can be traced back to bank rows
+        manifest, _ = verify_manifest_keys(manifest, key_temas, key_matrix)
+    item_stats_df = analyze_items(temas, responses, key_temas, key_matrix, manifest)
+    save_item_analysis(item_stats_df, os.path.dirname(output_path))
+    
+    # Per-subject and per-bank-item aggregates need the generator's question manifest
+    if manifest is not None:
+        save_manifest_summaries(manifest, temas, responses, key_temas, key_matrix, item_stats_df, os.path.dirname(output_path))
+    
+    # Cache the per-section counts for what-if scoring (scenarios.py)
+    key_rows = tema_rows(temas, key_temas)
+    careers = np.array([get_career_path_for_exam_type(tema) if tema else None for tema in temas], dtype=object)
+    graded = (key_rows >= 0) & (careers != None)  # noqa: E711
+    correct_counts, incorrect_counts = count_section_answers(responses[graded], key_matrix[key_rows[graded]])
+    save_section_counts(os.path.dirname(output_path), lithos[graded], [student_ids.get(code, '') for code in lithos[graded]],
+                        careers[graded], correct_counts, incorrect_counts)
+    
+    # DNI -> result index for the lookup service (results_service.py) and the full roster of every graded sheet
+    if build_results_index(detailed_path, os.path.dirname(output_path)):
+        generate_roster_pdf(detailed_path, os.path.join(os.path.dirname(output_path), "padron_resultados.pdf"))
+    
+    # Keep the raw answer sheets and keys in the compact audit archive (archive.py);
+    # dated like the PDF report, so a re-run never replaces an earlier sitting's archive
+    write_archive(os.path.join(os.path.dirname(output_path), f"respuestas_{timestamp}.lga"), lithos, temas, responses, key_table, label=timestamp)
+    
+    # Flag suspiciously similar answer sheets within each exam room and TEMA
+    suspects_df = detect_similar_sheets(lithos, temas, responses, key_temas, key_matrix, load_student_rooms(identifi_path))
+    save_suspect_pairs(suspects_df, os.path.dirname(output_path))
+    
     print(f"Results saved to {output_path}")
     print(f"Detailed results saved to {detailed_path}")
     print(f"PDF report saved to {pdf_path}")
@@ -107,19 +175,35 @@ def grade_exams(respuestas_path, claves_path, identifi_path, output_path):
     return results_df
 
 def main():
+    parser = argparse.ArgumentParser(description="Grade the admission exams")
+    parser.add_argument('--pipeline', action='store_true', help="overlap DBF reading, scoring and writing in separate threads")
+    parser.add_argument('--workers', type=int, default=2, help="scoring threads in pipeline mode")
+    parser.add_argument('--chunk-size', type=int, default=5000, help="answer sheets per chunk in pipeline mode")
+    parser.add_argument('--queue-size', type=int, default=4, help="chunks buffered between pipeline stages")
+    args = parser.parse_args()
+    
     # Define file paths
     script_dir = os.path.dirname(os.path.abspath(__file__))
     
     claves_path = os.path.join(script_dir, "data", "CLAVES.DBF")
+    # The generator's keys.txt, when copied into data/, replaces CLAVES.DBF
+    keys_txt_path = os.path.join(script_dir, "data", "keys.txt")
+    if os.path.exists(keys_txt_path):
+        claves_path = keys_txt_path
     respuestas_path = os.path.join(script_dir, "data", "RESPUEST.DBF")
     identifi_path = os.path.join(script_dir, "data", "IDENTIFI.DBF")
     output_path = os.path.join(script_dir, "output", "resultados.csv")
+    manifest_path = os.path.join(os.path.dirname(script_dir), "exam_generator", "output", "question_manifest.npz")
     
     # Create output directory if it doesn't exist
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
     
     # Grade the exams
-    results_df = grade_exams(respuestas_path, claves_path, identifi_path, output_path)
+    if args.pipeline:
+        results_df = grade_exams_pipelined(respuestas_path, claves_path, identifi_path, output_path, manifest_path,
+                                           workers=args.workers, chunk_size=args.chunk_size, queue_size=args.queue_size)
+    else:
+        results_df = grade_exams(respuestas_path, claves_path, identifi_path, output_path, manifest_path)
     
     # Display the results in the requested format
     # display_results_table(results_df)
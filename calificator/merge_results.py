@@ -0,0 +1,175 @@
+import os
+import csv
+import heapq
+import hashlib
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from config import SECTION_COLUMNS
+from admission import merit_key, merit_order
+
+class UnsortedShardError(Exception):
+    """Raised when a site's result file is not sorted for merging"""
+
+class BloomFilter:
+    """
+    Fixed-size set membership sketch. Memory is set by the expected capacity
+    and false-positive rate, not by how many items are added; an item that
+    was added is always reported as seen, an unseen one with probability
+    about error_rate
+    """
+
+    def __init__(self, capacity, error_rate=0.001):
+        self.num_bits = max(8, int(-capacity * np.log(error_rate) / np.log(2) ** 2))
+        self.num_hashes = max(1, int(round(self.num_bits / capacity * np.log(2))))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % self.num_bits for i in range(self.num_hashes)]
+
+    def add(self, item):
+        """Add an item; returns True if it was (probably) already present"""
+        present = True
+        for position in self._positions(item):
+            byte, bit = divmod(position, 8)
+            if not self.bits[byte] & (1 << bit):
+                present = False
+                self.bits[byte] |= 1 << bit
+        return present
+
+def read_shard(path, site, score_column):
+    """
+    Stream the rows of one site's result file, checking on the fly that it
+    is sorted in admission order (merit_key)
+    """
+    with open(path, newline='', encoding='utf-8') as f:
+        previous = None
+        for line_number, row in enumerate(csv.DictReader(f), start=2):
+            key = merit_key(row, score_column)
+            if previous is not None and key < previous:
+                raise UnsortedShardError(f"{path} is not sorted in admission order on {score_column} at line {line_number}")
+            previous = key
+            yield key, site, row
+
+def site_name(spec):
+    """A site is given as NAME=PATH or just PATH (named after its directory or file)"""
+    if '=' in spec:
+        name, path = spec.split('=', 1)
+        return name, path
+    path = spec
+    if os.path.basename(path) == "resultados_detallados.csv":
+        return os.path.basename(os.path.dirname(os.path.abspath(path))), path
+    return os.path.splitext(os.path.basename(path))[0], path
+
+def sort_shard(path, output_path, score_column='puntaje_total'):
+    """
+    Write a copy of one site's result file sorted in merge order (loads that
+    one file). The site's own file is never modified
+    """
+    if os.path.abspath(output_path) == os.path.abspath(path):
+        raise ValueError(f"Refusing to overwrite the site file {path}")
+    shard = pd.read_csv(path, dtype={'codigo_estudiante': str, 'dni_estudiante': str}, keep_default_na=False)
+    shard = sort_results_for_merge(shard, score_column)
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    shard.to_csv(output_path, index=False)
+    return output_path
+
+def sort_results_for_merge(detailed_results_df, score_column='puntaje_total'):
+    """
+    Order detailed results in admission order: career area, score, section
+    scores in the career's tie-break order and LITHO (see admission.merit_key)
+    """
+    if detailed_results_df.empty:
+        return detailed_results_df
+    order = merit_order(
+        detailed_results_df['area_postulada'].to_numpy(dtype=str),
+        detailed_results_df['carrera_asignada'].to_numpy(dtype=str),
+        detailed_results_df[score_column].to_numpy(dtype=float),
+        detailed_results_df[list(SECTION_COLUMNS.values())].to_numpy(dtype=float),
+        detailed_results_df['codigo_estudiante'].astype(str).to_numpy(dtype=str)
+    )
+    return detailed_results_df.iloc[order].reset_index(drop=True)
+
+def merge_site_results(site_specs, output_path, duplicates_path, score_column='puntaje_total', capacity=10_000_000):
+    """
+    k-way streaming merge of per-site resultados_detallados.csv files into a
+    national ranking. Only one row per site is held in memory at a time, and
+    LITHO/DNI values seen at more than one site are caught by fixed-size Bloom
+    filters and written to the duplicates file as they are found
+    """
+    sites = [site_name(spec) for spec in site_specs]
+    seen_codes = BloomFilter(capacity)
+    seen_dnis = BloomFilter(capacity)
+
+    fieldnames = None
+    for _, path in sites:
+        with open(path, newline='', encoding='utf-8') as f:
+            header = next(csv.reader(f), [])
+        if fieldnames is None:
+            fieldnames = header
+        elif header != fieldnames:
+            raise ValueError(f"{path} does not have the same columns as {sites[0][1]}")
+
+    streams = [read_shard(path, name, score_column) for name, path in sites]
+    merged_rows = 0
+    duplicates = 0
+    area_rank = {}
+
+    with open(output_path, 'w', newline='', encoding='utf-8') as output_file, \
+            open(duplicates_path, 'w', newline='', encoding='utf-8') as duplicates_file:
+        writer = csv.DictWriter(output_file, fieldnames=['orden_merito_nacional', 'sede'] + fieldnames + ['duplicado_probable'], lineterminator='\n')
+        duplicates_writer = csv.writer(duplicates_file, lineterminator='\n')
+        writer.writeheader()
+        duplicates_writer.writerow(['sede', 'campo', 'valor', 'area_postulada', score_column])
+
+        for _, site, row in heapq.merge(*streams, key=lambda item: item[0]):
+            duplicated = False
+            for field, seen in (('codigo_estudiante', seen_codes), ('dni_estudiante', seen_dnis)):
+                value = row.get(field, '')
+                if value and seen.add(value):
+                    duplicated = True
+                    duplicates += 1
+                    duplicates_writer.writerow([site, field, value, row['area_postulada'], row[score_column]])
+
+            area = row['area_postulada']
+            area_rank[area] = area_rank.get(area, 0) + 1
+            writer.writerow({'orden_merito_nacional': area_rank[area], 'sede': site, **row, 'duplicado_probable': duplicated})
+            merged_rows += 1
+
+    print(f"Merged {merged_rows} results from {len(sites)} sites into {output_path}")
+    print(f"Found {duplicates} probable duplicate LITHO/DNI values, saved to {duplicates_path}")
+    return merged_rows, duplicates
+
+def main():
+    parser = argparse.ArgumentParser(description="Merge per-site detailed results into a national ranking")
+    parser.add_argument('sites', nargs='+', help="resultados_detallados.csv of every site, as PATH or NAME=PATH")
+    parser.add_argument('--output', help="national ranking CSV (default: output/ranking_nacional.csv)")
+    parser.add_argument('--score-column', default='puntaje_total', help="score to rank on (e.g. puntaje_equiparado)")
+    parser.add_argument('--capacity', type=int, default=10_000_000, help="expected number of applicants, sizes the duplicate filters")
+    parser.add_argument('--sort-inputs', action='store_true', help="merge sorted copies of the site files (written next to the output; the site files are not modified)")
+    args = parser.parse_args()
+
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    output_path = args.output or os.path.join(script_dir, "output", "ranking_nacional.csv")
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    duplicates_path = os.path.join(os.path.dirname(os.path.abspath(output_path)), "duplicados_sedes.csv")
+
+    sites = args.sites
+    if args.sort_inputs:
+        sorted_dir = os.path.join(os.path.dirname(os.path.abspath(output_path)), "sedes_ordenadas")
+        sites = [f"{name}={sort_shard(path, os.path.join(sorted_dir, f'{k + 1:02d}_{name}.csv'), args.score_column)}"
+                 for k, (name, path) in enumerate(site_name(spec) for spec in args.sites)]
+        print(f"Sorted copies of the site files saved to {sorted_dir}")
+
+    try:
+        merge_site_results(sites, output_path, duplicates_path, args.score_column, args.capacity)
+    except UnsortedShardError as e:
+        print(f"Error: {e}; run again with --sort-inputs")
+
+if __name__ == "__main__":
+    main()
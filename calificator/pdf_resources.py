@@ -0,0 +1,66 @@
+import os
+import functools
+from PIL import Image
+from reportlab import rl_config
+from reportlab.lib.utils import ImageReader
+
+# Used by both tools: the exam generator loads this file by path
+# (exam_generator/shared.py), so it must not import either tool's config
+
+LOGO_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "images", "logo.png")
+# Width of the logo on the page (points) and resolution it is resampled to
+LOGO_WIDTH = 130
+LOGO_DPI = 200
+LOGO_FORM = 'logo'
+
+@functools.lru_cache(maxsize=None)
+def logo_image(path=LOGO_PATH, width=LOGO_WIDTH, dpi=LOGO_DPI):
+    """
+    The logo decoded and resampled once per process.
+    Returns (ImageReader, width, height) in points, or None when the file is missing
+    """
+    if not os.path.exists(path):
+        print(f"Warning: Logo not found at {path}")
+        return None
+    with Image.open(path) as image:
+        image = image.convert('RGBA')
+        height = width * image.height / image.width
+        pixels = round(width * dpi / 72)
+        if pixels < image.width:
+            image = image.resize((pixels, max(1, round(pixels * image.height / image.width))), Image.LANCZOS)
+        return ImageReader(image), width, height
+
+def draw_logo(pdf, x, y, path=LOGO_PATH, width=LOGO_WIDTH):
+    """
+    Draw the logo with its lower left corner at (x, y). The image is
+    embedded once per document as a form XObject; later pages only
+    reference it. Returns the logo height (0 without a logo)
+    """
+    logo = logo_image(path, width)
+    if logo is None:
+        return 0
+    image, width, height = logo
+    if not pdf.hasForm(LOGO_FORM):
+        # The image stream is encoded when it is drawn; ASCII85 would make it
+        # a quarter larger and is slow without reportlab's C accelerator.
+        # Only the logo is affected, every other stream keeps the settings
+        use_a85 = rl_config.useA85
+        rl_config.useA85 = 0
+        try:
+            pdf.beginForm(LOGO_FORM)
+            pdf.drawImage(image, 0, 0, width, height, mask='auto')
+            pdf.endForm()
+        finally:
+            rl_config.useA85 = use_a85
+    pdf.saveState()
+    pdf.translate(x, y)
+    pdf.doForm(LOGO_FORM)
+    pdf.restoreState()
+    return height
+
+def logo_page_decorator(pdf, doc):
+    """onPage callback for platypus documents: logo at the top right, inside the top margin"""
+    width, height = doc.pagesize
+    logo = logo_image()
+    if logo is not None:
+        draw_logo(pdf, width - doc.rightMargin - logo[1], height - doc.topMargin + (doc.topMargin - logo[2]) / 2)
@@ -0,0 +1,423 @@
+import os
+import csv
+import time
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+from dbfread import DBF
+
+from config import CAREER_PATHS, SECTION_COLUMNS, EXAM_STRUCTURE, EQUATING_METHOD
+from data_loader import get_career_path_for_exam_type, load_student_identifications, load_student_rooms
+from response_matrix import QUESTION_COLUMNS, encode_answers, tema_rows
+from score_calculator import count_section_answers, calculate_scores_batch
+from answer_keys import load_answer_key_table
+from admission import AdmissionSelector, save_admission_results
+from item_analysis import ItemAnalysis, load_generator_layout, attach_manifest_items, save_item_analysis
+from provenance import load_question_manifest, verify_manifest_keys, save_manifest_summaries
+from copy_detection import detect_similar_sheets, save_suspect_pairs
+from merge_results import sort_shard
+from report_generator import generate_pdf_report, generate_roster_pdf
+from scenarios import save_section_counts
+from equating import ScoreEquating, save_equating_summary
+from results_service import build_results_index
+
+RESULT_COLUMNS = ['codigo_estudiante', 'dni_estudiante', 'puntajes_correctos']
+DETAILED_COLUMNS = [
+    'codigo_estudiante', 'dni_estudiante', 'tipo_examen', 'carrera_asignada',
+    'puntaje_matematica', 'puntaje_ciencias', 'puntaje_humanidades', 'puntaje_aptitud',
+    'puntaje_ciencias_carrera', 'puntaje_humanidades_carrera', 'puntaje_ingenieria_carrera',
+    'area_postulada', 'puntaje_total'
+]
+
+# Sentinel passed down the queues once a stage has no more work
+_DONE = object()
+
+class PipelineCancelled(Exception):
+    """Raised inside a stage when the pipeline is being shut down"""
+
+class MonitoredQueue:
+    """
+    Bounded queue that records its depth on every put and get, so the
+    pipeline can report which stage was starved and which was the bottleneck
+    """
+
+    def __init__(self, name, maxsize, cancel_event):
+        self.name = name
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.cancel_event = cancel_event
+        self.samples = 0
+        self.depth_sum = 0
+        self.max_depth = 0
+        self.full_waits = 0
+        self.lock = threading.Lock()
+
+    def _record(self):
+        depth = self.queue.qsize()
+        with self.lock:
+            self.samples += 1
+            self.depth_sum += depth
+            self.max_depth = max(self.max_depth, depth)
+
+    def put(self, item):
+        """Blocking put that gives up as soon as the pipeline is cancelled"""
+        if self.queue.full():
+            with self.lock:
+                self.full_waits += 1
+        while True:
+            if self.cancel_event.is_set():
+                raise PipelineCancelled()
+            try:
+                self.queue.put(item, timeout=0.1)
+                break
+            except queue.Full:
+                continue
+        self._record()
+
+    def get(self):
+        """Blocking get that gives up as soon as the pipeline is cancelled"""
+        while True:
+            if self.cancel_event.is_set():
+                raise PipelineCancelled()
+            try:
+                item = self.queue.get(timeout=0.1)
+                break
+            except queue.Empty:
+                continue
+        self._record()
+        return item
+
+    def metrics(self):
+        return {
+            'cola': self.name,
+            'capacidad': self.queue.maxsize,
+            'profundidad_media': round(self.depth_sum / self.samples, 2) if self.samples else 0,
+            'profundidad_maxima': self.max_depth,
+            'esperas_por_cola_llena': self.full_waits
+        }
+
+def score_chunk(lithos, temas, responses, key_table, career_by_tema):
+    """
+    Score one chunk of encoded answer sheets with the vectorized scorer.
+    Returns the results frame, the detailed results frame (None if nothing
+    was graded), the (careers, correct, incorrect) section counts of the graded
+    sheets and how many sheets were skipped for lacking a TEMA, key or career
+    """
+    rows = tema_rows(temas, key_table.key_temas)
+    careers = np.array([career_by_tema.get(tema) if tema else None for tema in temas], dtype=object)
+    has_tema = temas != ''
+    graded = (rows >= 0) & (careers != None)  # noqa: E711
+
+    scores = np.zeros(len(temas))
+    detailed = None
+    counts = None
+    if graded.any():
+        correct, incorrect = count_section_answers(responses[graded], key_table.key_matrix[rows[graded]])
+        adjusted, career_scores = calculate_scores_batch(correct, incorrect)
+        counts = (careers[graded], correct, incorrect)
+        career_index = np.array([list(CAREER_PATHS).index(path) for path in careers[graded]], dtype=np.int64)
+        totals = career_scores[np.arange(len(career_index)), career_index]
+        scores[graded] = totals
+
+        detailed = pd.DataFrame({
+            'codigo_estudiante': lithos[graded],
+            'tipo_examen': temas[graded],
+            'carrera_asignada': careers[graded]
+        })
+        for s, (section, details) in enumerate(EXAM_STRUCTURE.items()):
+            weights = np.array([details["weights"][path] for path in careers[graded]], dtype=float)
+            detailed[SECTION_COLUMNS[section]] = adjusted[:, s] * weights
+        for column, c in zip(['puntaje_ciencias_carrera', 'puntaje_humanidades_carrera', 'puntaje_ingenieria_carrera'], range(career_scores.shape[1])):
+            detailed[column] = career_scores[:, c]
+        detailed['area_postulada'] = [CAREER_PATHS[path] for path in careers[graded]]
+        detailed['puntaje_total'] = totals
+
+    results = pd.DataFrame({'codigo_estudiante': lithos[has_tema], 'puntajes_correctos': scores[has_tema]})
+    return results, detailed, counts, int((~has_tema).sum()) + int((has_tema & ~graded).sum())
+
+class GradingPipeline:
+    """
+    Staged grading: a DBF reader thread, scoring worker threads and a result
+    writer thread connected by bounded queues.
+
+    The reader parses RESPUEST.DBF record by record and hands fixed-size
+    chunks of encoded responses to the workers; the workers score a chunk
+    with the vectorized scorer; the writer appends the rows to the CSV files
+    (in input order), feeds the admission selection and item analysis and
+    keeps the encoded answer sheets (100 bytes each) for the archive and
+    copy detection.
+    A full queue blocks the stage feeding it (backpressure) and any failure
+    or cancel() stops every stage.
+    """
+
+    def __init__(self, respuestas_path, key_table, output_path, student_ids_future,
+                 workers=2, chunk_size=5000, queue_size=4):
+        self.respuestas_path = respuestas_path
+        self.key_table = key_table
+        self.output_path = output_path
+        self.detailed_path = os.path.join(os.path.dirname(output_path), "resultados_detallados.csv")
+        self.student_ids_future = student_ids_future
+        self.workers = workers
+        self.chunk_size = chunk_size
+
+        self.cancel_event = threading.Event()
+        self.read_queue = MonitoredQueue('lectura->calificacion', queue_size, self.cancel_event)
+        self.write_queue = MonitoredQueue('calificacion->escritura', queue_size, self.cancel_event)
+        self.errors = []
+        self.stage_times = {}
+        self.stage_lock = threading.Lock()
+
+        self.selector = AdmissionSelector()
+        self.equating = ScoreEquating(EQUATING_METHOD) if EQUATING_METHOD else None
+        self.item_analysis = ItemAnalysis(key_table.key_temas, key_table.key_matrix)
+        self.graded = 0
+        self.skipped = 0
+        self.section_counts = []
+        self.sheets = []
+
+        # Career path of every TEMA with a key, resolved once
+        self.career_by_tema = {tema: get_career_path_for_exam_type(tema) for tema in key_table.key_temas}
+
+    def cancel(self):
+        """Ask every stage to stop as soon as possible"""
+        self.cancel_event.set()
+
+    def _run_stage(self, name, target):
+        start = time.perf_counter()
+        try:
+            target()
+        except PipelineCancelled:
+            pass
+        except Exception as e:
+            self.errors.append(f"{name}: {e}")
+            self.cancel()
+        finally:
+            with self.stage_lock:
+                self.stage_times[name] = self.stage_times.get(name, 0) + time.perf_counter() - start
+
+    def _read(self):
+        """Reader stage: DBF records -> encoded response chunks"""
+        dbf = DBF(self.respuestas_path, encoding='latin-1')
+        sequence = 0
+        lithos, temas, answers = [], [], []
+
+        def flush():
+            nonlocal sequence, lithos, temas, answers
+            responses = encode_answers(np.array(answers, dtype=object).reshape(len(answers), len(QUESTION_COLUMNS)))
+            self.read_queue.put((sequence, np.array(lithos, dtype=object), np.array(temas, dtype='U1'), responses))
+            sequence += 1
+            lithos, temas, answers = [], [], []
+
+        for index, record in enumerate(dbf):
+            if self.cancel_event.is_set():
+                raise PipelineCancelled()
+            lithos.append(record.get('LITHO', f"{index + 1:06d}"))
+            temas.append(record.get('TEMA') or '')
+            answers.append([record.get(column) or '' for column in QUESTION_COLUMNS])
+            if len(lithos) == self.chunk_size:
+                flush()
+        if lithos:
+            flush()
+
+        for _ in range(self.workers):
+            self.read_queue.put(_DONE)
+
+    def _score(self):
+        """Scoring stage: encoded chunk -> result and detailed result frames"""
+        while True:
+            item = self.read_queue.get()
+            if item is _DONE:
+                self.write_queue.put(_DONE)
+                return
+            sequence, lithos, temas, responses = item
+
+            results, detailed, counts, skipped = score_chunk(lithos, temas, responses, self.key_table, self.career_by_tema)
+            self.write_queue.put((sequence, results, detailed, counts, lithos, temas, responses, skipped))
+
+    def _write(self):
+        """
+        Writer stage: append chunks to temporary CSV files in input order;
+        run() moves them over the previous results only once every stage succeeded
+        """
+        pending = {}
+        next_sequence = 0
+        finished_workers = 0
+        student_ids = None
+
+        with open(self.output_path + ".tmp", 'w', newline='', encoding='utf-8') as results_file, \
+                open(self.detailed_path + ".tmp", 'w', newline='', encoding='utf-8') as detailed_file:
+            # Same line endings as DataFrame.to_csv, used for the data rows
+            csv.writer(results_file, lineterminator='\n').writerow(RESULT_COLUMNS)
+            csv.writer(detailed_file, lineterminator='\n').writerow(DETAILED_COLUMNS)
+
+            while finished_workers < self.workers:
+                item = self.write_queue.get()
+                if item is _DONE:
+                    finished_workers += 1
+                    continue
+                pending[item[0]] = item
+
+                # Chunks can finish out of order; write them back in input order
+                while next_sequence in pending:
+                    _, results, detailed, counts, lithos, temas, responses, skipped = pending.pop(next_sequence)
+                    next_sequence += 1
+
+                    if student_ids is None:
+                        student_ids = self.student_ids_future.result()
+                    results.insert(1, 'dni_estudiante', [student_ids.get(code, '') for code in results['codigo_estudiante']])
+                    results.to_csv(results_file, header=False, index=False)
+
+                    if detailed is not None:
+                        detailed.insert(1, 'dni_estudiante', [student_ids.get(code, '') for code in detailed['codigo_estudiante']])
+                        detailed.to_csv(detailed_file, header=False, index=False)
+                        if self.equating is None:
+                            for row in detailed.to_dict('records'):
+                                self.selector.add(row)
+                        else:
+                            self.equating.update(detailed['tipo_examen'], detailed['carrera_asignada'], detailed['puntaje_total'])
+                        self.graded += len(detailed)
+                        self.section_counts.append((detailed['codigo_estudiante'].to_numpy(), detailed['dni_estudiante'].to_numpy()) + counts)
+
+                    self.item_analysis.update(temas, responses)
+                    self.sheets.append((lithos, temas, responses))
+                    self.skipped += skipped
+
+    def run(self):
+        """Run all stages to completion; returns False if the pipeline failed or was cancelled"""
+        threads = [threading.Thread(target=self._run_stage, args=('lectura', self._read), daemon=True)]
+        threads += [threading.Thread(target=self._run_stage, args=('calificacion', self._score), daemon=True) for _ in range(self.workers)]
+        threads.append(threading.Thread(target=self._run_stage, args=('escritura', self._write), daemon=True))
+
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(timeout=0.5)
+        except KeyboardInterrupt:
+            print("Cancelling grading pipeline...")
+            self.cancel()
+            for thread in threads:
+                thread.join()
+
+        for error in self.errors:
+            print(f"Error in pipeline stage {error}")
+        completed = not self.cancel_event.is_set()
+        for path in (self.output_path, self.detailed_path):
+            if not os.path.exists(path + ".tmp"):
+                continue
+            if completed:
+                os.replace(path + ".tmp", path)
+            else:
+                os.remove(path + ".tmp")
+        return completed
+
+    def answer_sheets(self):
+        """(lithos, temas, responses) of every sheet read, in input order"""
+        if not self.sheets:
+            return np.array([], dtype=object), np.array([], dtype='U1'), np.zeros((0, len(QUESTION_COLUMNS)), dtype=np.uint8)
+        return tuple(np.concatenate(parts) for parts in zip(*self.sheets))
+
+    def metrics(self):
+        """Per-queue depth metrics and how long each stage ran (seconds, summed over workers)"""
+        return [self.read_queue.metrics(), self.write_queue.metrics()], dict(self.stage_times)
+
+def equate_detailed_results(detailed_path, equating, chunk_size=100000):
+    """
+    Second pass for score equating: stream resultados_detallados.csv in
+    chunks, add puntaje_equiparado and select admissions on it
+    """
+    selector = AdmissionSelector(score_column='puntaje_equiparado')
+    equated_path = detailed_path + ".tmp"
+    with open(equated_path, 'w', newline='', encoding='utf-8') as equated_file:
+        header = True
+        for chunk in pd.read_csv(detailed_path, chunksize=chunk_size, dtype={'codigo_estudiante': str, 'dni_estudiante': str}, keep_default_na=False):
+            chunk['puntaje_equiparado'] = equating.transform(chunk['tipo_examen'], chunk['puntaje_total'])
+            chunk.to_csv(equated_file, header=header, index=False)
+            header = False
+            for row in chunk.to_dict('records'):
+                selector.add(row)
+    os.replace(equated_path, detailed_path)
+    return selector
+
+def sort_detailed_results(detailed_path, score_column='puntaje_total'):
+    """
+    Rewrite resultados_detallados.csv in merge order (merge_results.py). The
+    writer stage appends rows in input order, so this loads the file once
+    """
+    sorted_path = sort_shard(detailed_path, detailed_path + ".tmp", score_column)
+    os.replace(sorted_path, detailed_path)
+
+def grade_exams_pipelined(respuestas_path, claves_path, identifi_path, output_path, manifest_path=None,
+                          workers=2, chunk_size=5000, queue_size=4):
+    """
+    Pipelined variant of grade_exams: reading, scoring and writing overlap
+    instead of running one after the other. Writes the same output files
+    """
+    start = time.perf_counter()
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    key_table = load_answer_key_table(claves_path)
+
+    # IDENTIFI.DBF is only needed by the writer, so it loads while grading starts
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        student_ids_future = executor.submit(load_student_identifications, identifi_path)
+        pipeline = GradingPipeline(respuestas_path, key_table, output_path, student_ids_future,
+                                   workers=workers, chunk_size=chunk_size, queue_size=queue_size)
+        completed = pipeline.run()
+        student_ids = student_ids_future.result()
+
+    if not completed:
+        print("Grading pipeline did not complete; previous results were left unchanged")
+        return None
+
+    output_dir = os.path.dirname(output_path)
+    timestamp = pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')
+    queue_metrics, stage_times = pipeline.metrics()
+    print(f"Graded {pipeline.graded} exams ({pipeline.skipped} sheets without exam type or answer key)")
+    for metrics in queue_metrics:
+        print(f"Queue {metrics['cola']}: mean depth {metrics['profundidad_media']}, max {metrics['profundidad_maxima']}/{metrics['capacidad']}, full waits {metrics['esperas_por_cola_llena']}")
+    for stage, seconds in stage_times.items():
+        print(f"Stage {stage}: {seconds:.2f}s")
+    print(f"Pipeline wall time: {time.perf_counter() - start:.2f}s")
+
+    detailed_path = pipeline.detailed_path
+    selector = pipeline.selector
+    score_column = 'puntaje_total'
+    if pipeline.equating is not None and pipeline.graded:
+        selector = equate_detailed_results(detailed_path, pipeline.equating)
+        save_equating_summary(pipeline.equating, output_dir)
+        score_column = 'puntaje_equiparado'
+    if pipeline.graded:
+        sort_detailed_results(detailed_path, score_column)
+    save_admission_results(selector, output_dir)
+    if pipeline.section_counts:
+        save_section_counts(output_dir, *(np.concatenate(parts) for parts in zip(*pipeline.section_counts)))
+
+    lithos, temas, responses = pipeline.answer_sheets()
+    key_temas, key_matrix = key_table.key_temas, key_table.key_matrix
+    item_stats_df = pipeline.item_analysis.statistics(load_generator_layout())
+    manifest = load_question_manifest(manifest_path) if manifest_path else None
+    if manifest is not None:
+        manifest, _ = verify_manifest_keys(manifest, key_temas, key_matrix)
+        item_stats_df = attach_manifest_items(item_stats_df, manifest)
+    save_item_analysis(item_stats_df, output_dir)
+    if manifest is not None:
+        save_manifest_summaries(manifest, temas, responses, key_temas, key_matrix, item_stats_df, output_dir)
+
+    if build_results_index(detailed_path, output_dir):
+        generate_roster_pdf(detailed_path, os.path.join(output_dir, "padron_resultados.pdf"))
+    # archive.py re-grades with score_chunk, so it is imported here rather than at the top
+    from archive import write_archive
+    write_archive(os.path.join(output_dir, f"respuestas_{timestamp}.lga"), lithos, temas, responses, key_table, label=timestamp)
+    suspects_df = detect_similar_sheets(lithos, temas, responses, key_temas, key_matrix, load_student_rooms(identifi_path))
+    save_suspect_pairs(suspects_df, output_dir)
+
+    results_df = pd.read_csv(output_path, dtype={'codigo_estudiante': str, 'dni_estudiante': str})
+    pdf_path = os.path.join(output_dir, f"resultados_{timestamp}.pdf")
+    generate_pdf_report(results_df, pdf_path, student_ids)
+
+    print(f"Results saved to {output_path}")
+    print(f"PDF report saved to {pdf_path}")
+    return results_df
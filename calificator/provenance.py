@@ -0,0 +1,179 @@
+import os
+import numpy as np
+import pandas as pd
+
+from config import NUM_QUESTIONS
+from response_matrix import tema_rows, correct_matrix
+
+UNKNOWN_SUBJECT = 255
+
+class QuestionManifest:
+    """
+    Index over the generator's question_manifest.npz.
+
+    Holds, for every exam type (TEMA) and position, the subject ID, the row of
+    the subject's question bank CSV and the correct option, as (types x 100)
+    arrays so per-subject and per-item aggregates are plain array group-bys.
+    """
+
+    def __init__(self, exam_types, subjects, files, subject_ids, row_ids, correct_options):
+        self.exam_types = np.asarray(exam_types, dtype='U1')
+        self.subjects = np.asarray(subjects)
+        self.files = np.asarray(files)
+
+        # Pad every exam to the full sheet so positions line up with the response matrix
+        num_types = len(self.exam_types)
+        self.subject_ids = np.full((num_types, NUM_QUESTIONS), UNKNOWN_SUBJECT, dtype=np.uint8)
+        self.row_ids = np.zeros((num_types, NUM_QUESTIONS), dtype=np.uint32)
+        self.correct_options = np.zeros((num_types, NUM_QUESTIONS), dtype=np.uint8)
+        width = min(NUM_QUESTIONS, np.asarray(subject_ids).shape[1] if num_types else 0)
+        self.subject_ids[:, :width] = np.asarray(subject_ids)[:, :width]
+        self.row_ids[:, :width] = np.asarray(row_ids)[:, :width]
+        self.correct_options[:, :width] = np.asarray(correct_options)[:, :width]
+
+    def rows_for(self, temas):
+        """Row of each TEMA in the manifest (-1 when the TEMA is not in it)"""
+        return tema_rows(temas, self.exam_types)
+
+    def subset(self, rows):
+        """Manifest restricted to the given TEMA rows"""
+        return QuestionManifest(self.exam_types[rows], self.subjects, self.files,
+                                self.subject_ids[rows], self.row_ids[rows], self.correct_options[rows])
+
+    def item_table(self):
+        """One row per (TEMA, position) with the bank item it came from"""
+        known = self.subject_ids != UNKNOWN_SUBJECT
+        subject_ids = np.where(known, self.subject_ids, 0)
+        return pd.DataFrame({
+            'tema': np.repeat(self.exam_types, NUM_QUESTIONS),
+            'pregunta': np.tile(np.arange(1, NUM_QUESTIONS + 1), len(self.exam_types)),
+            'materia': np.where(known, self.subjects[subject_ids], '').ravel(),
+            'archivo': np.where(known, self.files[subject_ids], '').ravel(),
+            'fila': np.where(known, self.row_ids, -1).ravel()
+        })
+
+def load_question_manifest(manifest_path):
+    """Load the generator's question manifest (None if it is not available)"""
+    if not manifest_path or not os.path.exists(manifest_path):
+        print(f"Warning: Question manifest not found at {manifest_path}")
+        return None
+    try:
+        with np.load(manifest_path) as data:
+            return QuestionManifest(
+                data['exam_types'], data['subjects'], data['files'],
+                data['subject_ids'], data['row_ids'], data['correct_options']
+            )
+    except Exception as e:
+        print(f"Error loading question manifest from {manifest_path}: {e}")
+        return None
+
+def verify_manifest_keys(manifest, key_temas, key_matrix):
+    """
+    Keep only the manifest TEMAs whose correct options match the answer keys
+    used for grading. A TEMA whose keys differ was not printed from this
+    manifest, so its item statistics must not be attributed to bank rows.
+    TEMAs without a key cannot be checked and are dropped too.
+    Returns the verified manifest and the list of rejected TEMAs
+    """
+    key_rows = tema_rows(manifest.exam_types, key_temas)
+    verified = []
+    rejected = []
+    for t, tema in enumerate(manifest.exam_types):
+        if key_rows[t] < 0:
+            rejected.append(tema)
+            continue
+        # Only positions the manifest knows an answer for are compared
+        checked = (manifest.subject_ids[t] != UNKNOWN_SUBJECT) & (manifest.correct_options[t] != 0)
+        agreement = (manifest.correct_options[t][checked] == key_matrix[key_rows[t]][checked]).mean() if checked.any() else 0.0
+        if agreement == 1.0:
+            verified.append(t)
+        else:
+            rejected.append(tema)
+            print(f"Warning: Answer keys of TEMA {tema} match the question manifest on only {agreement:.0%} of the questions; "
+                  f"its items are not attributed to bank rows")
+    return manifest.subset(np.array(verified, dtype=np.int64)), rejected
+
+def subject_scores(manifest, temas, responses, key_temas, key_matrix):
+    """
+    Number of correct answers of every student in every manifest subject.
+    Returns an (n, num_subjects) matrix; students whose TEMA is not in the
+    manifest or has no key get a row of zeros
+    """
+    num_subjects = len(manifest.subjects)
+    scores = np.zeros((len(responses), num_subjects), dtype=np.int64)
+
+    key_rows = tema_rows(temas, key_temas)
+    manifest_rows = manifest.rows_for(temas)
+    graded = np.flatnonzero((key_rows >= 0) & (manifest_rows >= 0))
+    if len(graded) == 0:
+        return scores
+
+    correct = correct_matrix(responses[graded], key_matrix[key_rows[graded]])
+    subjects = manifest.subject_ids[manifest_rows[graded]].astype(np.int64)
+    counted = correct & (subjects != UNKNOWN_SUBJECT)
+
+    # Flatten (student, subject) into one bincount over the correct answers
+    cell = np.arange(len(graded))[:, None] * num_subjects + subjects
+    counts = np.bincount(cell[counted], minlength=len(graded) * num_subjects)
+    scores[graded] = counts.reshape(len(graded), num_subjects)
+    return scores
+
+def subject_summary(manifest, temas, responses, key_temas, key_matrix):
+    """Cohort-wide correct rate per subject"""
+    scores = subject_scores(manifest, temas, responses, key_temas, key_matrix)
+    manifest_rows = manifest.rows_for(temas)
+    graded = (manifest_rows >= 0) & (tema_rows(temas, key_temas) >= 0)
+
+    # Questions per subject on each exam type, then per student
+    num_subjects = len(manifest.subjects)
+    per_type = np.stack([np.bincount(row[row != UNKNOWN_SUBJECT], minlength=num_subjects) for row in manifest.subject_ids]) if len(manifest.exam_types) else np.zeros((0, num_subjects), dtype=np.int64)
+    questions = per_type[manifest_rows[graded]].sum(axis=0)
+    correct = scores[graded].sum(axis=0)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rate = np.where(questions > 0, correct / questions, np.nan)
+
+    return pd.DataFrame({
+        'materia': manifest.subjects,
+        'archivo': manifest.files,
+        'respuestas': questions,
+        'correctas': correct,
+        'tasa_acierto': np.round(rate, 4)
+    })
+
+def bank_item_summary(item_stats_df):
+    """
+    Aggregate item statistics of the same bank row across exam types,
+    weighting the difficulty by the number of examinees
+    """
+    items = item_stats_df[item_stats_df['fila'] >= 0].copy()
+    items['correctas'] = items['dificultad'] * items['examinados']
+    summary = items.groupby(['materia', 'archivo', 'fila'], as_index=False).agg(
+        apariciones=('tema', 'count'),
+        examinados=('examinados', 'sum'),
+        correctas=('correctas', 'sum'),
+        discriminacion=('discriminacion', 'mean')
+    )
+    summary['dificultad'] = np.round(summary['correctas'] / summary['examinados'], 4)
+    summary['discriminacion'] = np.round(summary['discriminacion'], 4)
+    return summary.drop(columns='correctas')
+
+def save_manifest_summaries(manifest, temas, responses, key_temas, key_matrix, item_stats_df, output_dir):
+    """
+    Write resumen_materias.csv and analisis_banco.csv for the exam types the
+    manifest covers. Summaries of an earlier run are removed when none is
+    covered, so they are never read as this sitting's bank history
+    """
+    subjects_path = os.path.join(output_dir, "resumen_materias.csv")
+    bank_path = os.path.join(output_dir, "analisis_banco.csv")
+    if (manifest.rows_for(temas) >= 0).any():
+        subject_summary(manifest, temas, responses, key_temas, key_matrix).to_csv(subjects_path, index=False)
+        bank_item_summary(item_stats_df).to_csv(bank_path, index=False)
+        print(f"Subject summary saved to {subjects_path}")
+        print(f"Bank item analysis saved to {bank_path}")
+        return
+
+    print("Warning: None of the graded exam types appear in the question manifest with matching answer keys")
+    for stale in (subjects_path, bank_path):
+        if os.path.exists(stale):
+            os.remove(stale)
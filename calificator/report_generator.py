@@ -1,11 +1,15 @@
 import os
+import numpy as np
 import pandas as pd
+from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import letter
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
 from reportlab.lib.styles import getSampleStyleSheet
 from reportlab.lib.units import inch
 from reportlab.lib import colors
 from score_calculator import calculate_vigesimal_score
+from pdf_resources import draw_logo, logo_page_decorator
+from results_service import load_result_records
 
 def generate_pdf_report(results_df, output_path, student_ids=None):
     """Generate a PDF report with the results"""
@@ -174,11 +178,112 @@ def generate_pdf_report(results_df, output_path, student_ids=None):
     
     # Build the PDF
     try:
-        doc.build(elements)
+        doc.build(elements, onFirstPage=logo_page_decorator, onLaterPages=logo_page_decorator)
         print(f"PDF report successfully generated at {output_path}")
     except Exception as e:
         print(f"Error generating PDF report: {e}")
 
+# Fixed roster layout (points): every page holds the same number of rows
+ROSTER_MARGIN = 50
+ROSTER_HEADER_HEIGHT = 62
+ROSTER_FOOTER_HEIGHT = 30
+ROSTER_ROW_HEIGHT = 13
+ROSTER_FONT_SIZE = 9
+ROSTER_HEADINGS = "  Orden  DNI         Código        Puntaje  Nota (20)  Condición"
+
+def _roster_line(rank, dni, code, score, grade, admitted):
+    """One roster row as fixed-width text, aligned with ROSTER_HEADINGS (monospaced font)"""
+    return f"{rank:>7}  {dni:<10}  {code:<10}  {score:>9.2f}  {grade:>9.2f}  {'ADMITIDO' if admitted else ''}"
+
+def generate_roster_pdf(detailed_path, output_path, page_size=letter):
+    """
+    Full results roster (every graded answer sheet of every area, in merit
+    order) drawn directly on the canvas from resultados_detallados.csv.
+    Sheets without a DNI are listed with an empty DNI column.
+
+    The layout is fixed, so rows per page are known in advance; the page
+    header of every area and the row stripes are drawn once as form
+    XObjects and reused on every page, and each page's rows are a single
+    monospaced text object. Every page is closed as soon as it is drawn;
+    reportlab still keeps the compressed page streams until save(), which is
+    a few KB per page.
+    """
+    records = load_result_records(detailed_path)
+    if records is None:
+        records = np.zeros(0, dtype=[('dni', 'S1'), ('codigo', 'S1'), ('area', 'U1'), ('puntaje', 'f8'),
+                                     ('nota', 'f8'), ('orden_merito', 'i4'), ('admitido', '?')])
+    width, height = page_size
+    rows_top = height - ROSTER_MARGIN - ROSTER_HEADER_HEIGHT
+    rows_per_page = int((rows_top - ROSTER_MARGIN - ROSTER_FOOTER_HEIGHT) // ROSTER_ROW_HEIGHT)
+    timestamp = pd.Timestamp.now().strftime('%d/%m/%Y %H:%M:%S')
+
+    pdf = canvas.Canvas(output_path, pagesize=page_size, pageCompression=1)
+    pdf.setTitle("Padrón de resultados")
+
+    # Row stripes, shared by every page
+    pdf.beginForm('franjas')
+    pdf.setFillColor(colors.Color(0.93, 0.94, 0.98))
+    for row in range(1, rows_per_page, 2):
+        pdf.rect(ROSTER_MARGIN, rows_top - (row + 1) * ROSTER_ROW_HEIGHT + 3, width - 2 * ROSTER_MARGIN, ROSTER_ROW_HEIGHT, stroke=0, fill=1)
+    pdf.endForm()
+
+    # Merit order: by area, then merit position
+    order = np.lexsort((records['orden_merito'], records['area']))
+    areas = records['area'][order]
+    area_starts = np.r_[0, np.flatnonzero(areas[1:] != areas[:-1]) + 1, len(order)] if len(order) else np.array([0])
+    page_number = 0
+
+    for a in range(len(area_starts) - 1):
+        area = str(areas[area_starts[a]])
+        area_size = area_starts[a + 1] - area_starts[a]
+
+        # Area header: title bar and column headings
+        header = f'encabezado_{a}'
+        pdf.beginForm(header)
+        draw_logo(pdf, ROSTER_MARGIN, height - ROSTER_MARGIN + 4)
+        pdf.setFillColor(colors.darkblue)
+        pdf.rect(ROSTER_MARGIN, height - ROSTER_MARGIN - 28, width - 2 * ROSTER_MARGIN, 28, stroke=0, fill=1)
+        pdf.setFillColor(colors.whitesmoke)
+        pdf.setFont('Helvetica-Bold', 13)
+        pdf.drawString(ROSTER_MARGIN + 8, height - ROSTER_MARGIN - 19, f"Resultados para {area}")
+        pdf.setFont('Helvetica', 9)
+        pdf.drawRightString(width - ROSTER_MARGIN - 8, height - ROSTER_MARGIN - 19, f"{area_size} postulantes")
+        pdf.setFillColor(colors.black)
+        pdf.setFont('Courier-Bold', ROSTER_FONT_SIZE)
+        pdf.drawString(ROSTER_MARGIN, rows_top + 8, ROSTER_HEADINGS)
+        pdf.setLineWidth(0.5)
+        pdf.line(ROSTER_MARGIN, rows_top + 4, width - ROSTER_MARGIN, rows_top + 4)
+        pdf.endForm()
+
+        for start in range(area_starts[a], area_starts[a + 1], rows_per_page):
+            page = records[order[start:min(start + rows_per_page, area_starts[a + 1])]]
+            page_number += 1
+
+            pdf.doForm('franjas')
+            pdf.doForm(header)
+            text = pdf.beginText(ROSTER_MARGIN, rows_top - ROSTER_ROW_HEIGHT + 6)
+            text.setFont('Courier', ROSTER_FONT_SIZE, leading=ROSTER_ROW_HEIGHT)
+            text.textLines([
+                _roster_line(rank, dni.decode('ascii'), code.decode('ascii'), score, grade, admitted)
+                for rank, dni, code, score, grade, admitted in zip(
+                    page['orden_merito'].tolist(), page['dni'], page['codigo'],
+                    page['puntaje'].tolist(), page['nota'].tolist(), page['admitido'].tolist())
+            ])
+            pdf.drawText(text)
+
+            pdf.setFont('Helvetica', 8)
+            pdf.drawString(ROSTER_MARGIN, ROSTER_MARGIN, f"Generado el {timestamp}")
+            pdf.drawRightString(width - ROSTER_MARGIN, ROSTER_MARGIN, f"Página {page_number}")
+            pdf.showPage()
+
+    if page_number == 0:
+        pdf.setFont('Helvetica', 12)
+        pdf.drawString(ROSTER_MARGIN, height - ROSTER_MARGIN - 20, "Sin resultados")
+        pdf.showPage()
+    pdf.save()
+    print(f"Results roster of {len(order)} applicants ({page_number} pages) saved to {output_path}")
+    return output_path
+
 def display_results_table(results_df):
     """Display the results in a formatted table"""
     if results_df is not None and not results_df.empty:
@@ -0,0 +1,81 @@
+import numpy as np
+
+from config import NUM_QUESTIONS, ANSWER_OPTIONS, BLANK_CODE, INVALID_CODE
+from data_loader import load_dbf_to_dataframe
+
+QUESTION_COLUMNS = [f'PREG_{i:03d}' for i in range(1, NUM_QUESTIONS + 1)]
+
+# Lookup table from a character code point to its answer code
+_CODE_TABLE = np.full(128, INVALID_CODE, dtype=np.uint8)
+_CODE_TABLE[0] = BLANK_CODE
+_CODE_TABLE[ord(' ')] = BLANK_CODE
+for _code, _option in enumerate(ANSWER_OPTIONS, start=1):
+    _CODE_TABLE[ord(_option)] = _code
+    _CODE_TABLE[ord(_option.lower())] = _code
+
+def encode_answers(values):
+    """
+    Encode a 2D array-like of answer strings ('A'-'E', '' or other marks)
+    into a uint8 matrix of answer codes
+    """
+    values = np.asarray(values, dtype=object)
+    # None becomes a blank; only the first character of each cell matters
+    cells = np.where(values == None, '', values).astype('U1')  # noqa: E711
+    code_points = cells.view(np.uint32).reshape(values.shape)
+    return _CODE_TABLE[np.minimum(code_points, 127)]
+
+def decode_answers(codes):
+    """Decode a uint8 matrix of answer codes back into answer strings"""
+    alphabet = np.array([''] + list(ANSWER_OPTIONS) + ['*'])
+    return alphabet[np.asarray(codes)]
+
+def response_matrix_from_dataframe(respuestas_df):
+    """
+    Build the response matrix from a RESPUEST.DBF DataFrame.
+    Returns (lithos, temas, responses) where responses is an (n, 100) uint8 matrix
+    """
+    n = len(respuestas_df)
+    lithos = respuestas_df['LITHO'].fillna('').astype(str).to_numpy() if 'LITHO' in respuestas_df else np.array([f"{i + 1:06d}" for i in range(n)])
+    temas = respuestas_df['TEMA'].fillna('').astype(str).to_numpy() if 'TEMA' in respuestas_df else np.full(n, '', dtype=object)
+
+    values = respuestas_df.reindex(columns=QUESTION_COLUMNS).fillna('').to_numpy(dtype=object)
+
+    return lithos, temas.astype('U1'), encode_answers(values)
+
+def load_response_matrix(respuestas_path):
+    """Load RESPUEST.DBF directly into a response matrix"""
+    respuestas_df = load_dbf_to_dataframe(respuestas_path)
+    if respuestas_df is None:
+        return None
+    return response_matrix_from_dataframe(respuestas_df)
+
+def answer_keys_to_matrix(answer_keys):
+    """
+    Turn an answer key dict (TEMA -> list of answers) into a key matrix.
+    Returns (key_temas, key_matrix) with one row of answer codes per TEMA
+    """
+    key_temas = np.array(sorted(answer_keys), dtype='U1')
+    key_matrix = np.zeros((len(key_temas), NUM_QUESTIONS), dtype=np.uint8)
+    for row, tema in enumerate(key_temas):
+        answers = list(answer_keys[tema])[:NUM_QUESTIONS]
+        key_matrix[row, :len(answers)] = encode_answers([answers])[0]
+    return key_temas, key_matrix
+
+def tema_rows(temas, key_temas):
+    """
+    Map each student's TEMA to its row in the key matrix.
+    Students whose TEMA has no key get -1
+    """
+    lookup = np.full(128, -1, dtype=np.int64)
+    for row, tema in enumerate(key_temas):
+        lookup[ord(tema)] = row
+    code_points = np.asarray(temas, dtype='U1').view(np.uint32)
+    return lookup[np.minimum(code_points, 127)]
+
+def correct_matrix(responses, keys):
+    """
+    Boolean matrix of correct answers given each student's key row.
+    A blank or invalid key never counts as correct (same rule as calculate_score)
+    """
+    valid_key = (keys != BLANK_CODE) & (keys != INVALID_CODE)
+    return (responses == keys) & valid_key
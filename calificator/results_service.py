@@ -0,0 +1,221 @@
+import os
+import json
+import time
+import asyncio
+import argparse
+from urllib.parse import unquote
+
+import numpy as np
+import pandas as pd
+
+from config import VACANCIES, SECTION_COLUMNS
+from score_calculator import calculate_vigesimal_score
+from admission import rank_applicants
+
+RESULTS_INDEX_FILE = "indice_resultados.npy"
+
+def load_result_records(detailed_path, chunk_size=200000):
+    """
+    Read resultados_detallados.csv into one fixed-width record per graded
+    answer sheet, in file order: DNI (empty if unknown), LITHO, area, score,
+    vigesimal grade, merit position, applicants in the area and admission.
+    Returns None when the file holds no graded results
+    """
+    try:
+        header = pd.read_csv(detailed_path, nrows=0).columns
+    except (FileNotFoundError, pd.errors.EmptyDataError):
+        header = []
+    if 'puntaje_total' not in header:
+        return None
+    score_column = 'puntaje_equiparado' if 'puntaje_equiparado' in header else 'puntaje_total'
+    columns = ['codigo_estudiante', 'dni_estudiante', 'carrera_asignada', 'area_postulada', score_column] + list(SECTION_COLUMNS.values())
+    detailed = pd.concat(pd.read_csv(detailed_path, usecols=columns, chunksize=chunk_size, keep_default_na=False,
+                                     dtype={'codigo_estudiante': str, 'dni_estudiante': str}), ignore_index=True)
+
+    areas = detailed['area_postulada'].to_numpy(dtype=str)
+    scores = detailed[score_column].to_numpy(dtype=float)
+    codes = detailed['codigo_estudiante'].to_numpy(dtype=str)
+    dnis = detailed['dni_estudiante'].to_numpy(dtype=str)
+    ranks = rank_applicants(areas, detailed['carrera_asignada'].to_numpy(dtype=str), scores,
+                            detailed[list(SECTION_COLUMNS.values())].to_numpy(dtype=float), codes)
+    area_names, area_ids = np.unique(areas, return_inverse=True)
+
+    def width(values):
+        return max(1, max((len(value) for value in values), default=1))
+
+    records = np.empty(len(detailed), dtype=[
+        ('dni', f'S{width(dnis)}'),
+        ('codigo', f'S{width(codes)}'),
+        ('area', f'U{width(area_names)}'),
+        ('puntaje', 'f8'),
+        ('nota', 'f8'),
+        ('orden_merito', 'i4'),
+        ('postulantes', 'i4'),
+        ('admitido', '?')
+    ])
+    records['dni'] = dnis
+    records['codigo'] = codes
+    records['area'] = areas
+    records['puntaje'] = np.round(scores, 4)
+    # Same rounding as the PDF report
+    records['nota'] = [calculate_vigesimal_score(score) for score in scores.tolist()]
+    records['orden_merito'] = ranks
+    records['postulantes'] = np.bincount(area_ids, minlength=len(area_names))[area_ids]
+    records['admitido'] = ranks <= np.array([VACANCIES.get(area, 0) for area in areas], dtype=np.int64)
+    return records
+
+def build_results_index(detailed_path, output_dir, chunk_size=200000):
+    """
+    Build the DNI -> result index published by the lookup service from
+    resultados_detallados.csv: the records of load_result_records sorted by
+    DNI and saved as a .npy file that the service memory-maps
+    """
+    index_path = os.path.join(output_dir, RESULTS_INDEX_FILE)
+    records = load_result_records(detailed_path, chunk_size)
+    if records is None:
+        print(f"Warning: No graded results in {detailed_path}; results index not built")
+        # An index left by an earlier run would keep serving its results
+        if os.path.exists(index_path):
+            os.remove(index_path)
+        return None
+
+    # Applicants without a DNI cannot be looked up; a repeated DNI keeps its best position
+    order = np.lexsort((records['orden_merito'], records['dni']))
+    order = order[records['dni'][order] != b'']
+    dnis = records['dni'][order]
+    first = np.r_[True, dnis[1:] != dnis[:-1]] if len(order) else np.zeros(0, dtype=bool)
+    repeated = int((~first).sum())
+    index = records[order[first]]
+
+    np.save(index_path, index)
+    print(f"Results index of {len(index)} applicants saved to {index_path}")
+    if repeated:
+        print(f"Warning: {repeated} repeated DNIs in {detailed_path}; the best-ranked result was kept")
+    return index_path
+
+class ResultsIndex:
+    """
+    Read side of the results index. The records stay memory-mapped; only
+    the sorted DNI column is copied into memory, so a lookup is one binary
+    search over a contiguous array and one record read from the page cache
+    """
+
+    def __init__(self, index_path):
+        self.records = np.load(index_path, mmap_mode='r')
+        self.dnis = np.ascontiguousarray(self.records['dni'])
+
+    def __len__(self):
+        return len(self.dnis)
+
+    def lookup(self, dni):
+        """Return the result of a DNI as a dict, or None if it is not in the index"""
+        try:
+            key = dni.encode('ascii')
+        except UnicodeEncodeError:
+            return None
+        position = int(np.searchsorted(self.dnis, key))
+        if position >= len(self.dnis) or self.dnis[position] != key:
+            return None
+        record = self.records[position]
+        return {
+            'dni': dni,
+            'codigo_estudiante': record['codigo'].decode('ascii'),
+            'area_postulada': str(record['area']),
+            'puntaje': float(record['puntaje']),
+            'nota': float(record['nota']),
+            'orden_merito': int(record['orden_merito']),
+            'postulantes': int(record['postulantes']),
+            'admitido': bool(record['admitido'])
+        }
+
+_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed'}
+
+class ResultsService:
+    """
+    Minimal HTTP/1.1 server over asyncio streams with keep-alive:
+    GET /resultado/<DNI> returns the applicant's result as JSON and
+    GET /salud the size of the index and how many requests were served
+    """
+
+    def __init__(self, index):
+        self.index = index
+        self.requests = 0
+        self.started = time.time()
+
+    def route(self, method, path):
+        if method != 'GET':
+            return 405, {'error': 'solo GET'}
+        if path.startswith('/resultado/'):
+            result = self.index.lookup(unquote(path[len('/resultado/'):]))
+            if result is None:
+                return 404, {'error': 'DNI no encontrado'}
+            return 200, result
+        if path == '/salud':
+            return 200, {'postulantes': len(self.index), 'consultas': self.requests, 'activo_segundos': round(time.time() - self.started)}
+        return 404, {'error': 'ruta no encontrada'}
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                # Headers are read and ignored, except for closing the connection
+                keep_alive = True
+                while True:
+                    header = await reader.readline()
+                    if header in (b'\r\n', b'\n', b''):
+                        break
+                    if header.lower().startswith(b'connection:') and b'close' in header.lower():
+                        keep_alive = False
+
+                parts = request_line.decode('latin-1').split()
+                if len(parts) != 3:
+                    status, body = 400, {'error': 'solicitud invalida'}
+                    keep_alive = False
+                else:
+                    status, body = self.route(parts[0], parts[1])
+                self.requests += 1
+
+                payload = json.dumps(body, ensure_ascii=False).encode('utf-8')
+                writer.write(
+                    f"HTTP/1.1 {status} {_REASONS[status]}\r\n"
+                    f"Content-Type: application/json; charset=utf-8\r\n"
+                    f"Content-Length: {len(payload)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin-1') + payload
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionResetError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host, port):
+        server = await asyncio.start_server(self.handle, host, port, backlog=1024)
+        print(f"Serving {len(self.index)} results on http://{host}:{port}/resultado/<DNI>")
+        async with server:
+            await server.serve_forever()
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve applicant results by DNI from the precomputed index")
+    parser.add_argument('--index', help=f"results index (default: output/{RESULTS_INDEX_FILE})")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    args = parser.parse_args()
+
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    index_path = args.index or os.path.join(script_dir, "output", RESULTS_INDEX_FILE)
+    if not os.path.exists(index_path):
+        print(f"Error: Results index not found at {index_path}; run the grader first")
+        return
+
+    service = ResultsService(ResultsIndex(index_path))
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        print(f"Stopped after {service.requests} requests")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+import os
+import json
+import argparse
+import numpy as np
+import pandas as pd
+
+from config import EXAM_STRUCTURE, CAREER_PATHS, VACANCIES, WRONG_ANSWER_PENALTY
+from score_calculator import section_weight_matrix
+from admission import rank_applicants
+
+SECTION_COUNTS_FILE = "conteos_secciones.npz"
+
+def save_section_counts(output_dir, codes, dnis, careers, correct_counts, incorrect_counts):
+    """
+    Cache the per-section correct and incorrect counts of every graded
+    student, which is all a re-scoring with other weights or penalties needs
+    """
+    counts_path = os.path.join(output_dir, SECTION_COUNTS_FILE)
+    np.savez_compressed(
+        counts_path,
+        codes=np.asarray(codes, dtype=str),
+        dnis=np.asarray(dnis, dtype=str),
+        careers=np.asarray(careers, dtype='U1'),
+        correct=np.asarray(correct_counts, dtype=np.int16),
+        incorrect=np.asarray(incorrect_counts, dtype=np.int16)
+    )
+    print(f"Section counts saved to {counts_path}")
+    return counts_path
+
+def load_section_counts(counts_path):
+    """Load the cached per-section counts written by the grader"""
+    with np.load(counts_path) as data:
+        return {name: data[name] for name in data.files}
+
+def load_scenarios(scenarios_path):
+    """
+    Load scenarios from a JSON list. Every scenario has a name and may
+    override the wrong-answer penalty and any section weights, e.g.
+    {"name": "aptitud_5", "penalty": 0.2, "weights": {"Aptitud Académica": {"A": 5, "B": 5, "C": 5}}}
+    Returns the scenario names, a (scenarios, sections, career paths) weight
+    array and the penalties; the first scenario is always the current config
+    """
+    with open(scenarios_path, encoding='utf-8') as f:
+        scenarios = json.load(f)
+
+    sections = list(EXAM_STRUCTURE)
+    paths = list(CAREER_PATHS)
+    base_weights = section_weight_matrix()
+
+    names = ['base']
+    weights = [base_weights]
+    penalties = [WRONG_ANSWER_PENALTY]
+    for scenario in scenarios:
+        scenario_weights = base_weights.copy()
+        for section, section_weights in scenario.get('weights', {}).items():
+            if section not in sections:
+                raise ValueError(f"Unknown section '{section}' in scenario {scenario.get('name')}")
+            for path, weight in section_weights.items():
+                scenario_weights[sections.index(section), paths.index(path)] = weight
+        names.append(scenario['name'])
+        weights.append(scenario_weights)
+        penalties.append(scenario.get('penalty', WRONG_ANSWER_PENALTY))
+
+    return names, np.stack(weights), np.array(penalties, dtype=float)
+
+def score_scenarios(correct_counts, incorrect_counts, careers, weights, penalties, chunk_size=200000):
+    """
+    Score every student under every scenario in one batched operation.
+    weights is (scenarios, sections, career paths) and penalties (scenarios,).
+    Returns the total for the student's own career path (scenarios, n) and the
+    weighted section scores for it (scenarios, n, sections)
+    """
+    num_scenarios = len(penalties)
+    n, num_sections = correct_counts.shape
+    paths = np.array(list(CAREER_PATHS))
+    path_order = np.argsort(paths)
+    career_index = path_order[np.searchsorted(paths[path_order], careers)]
+
+    totals = np.empty((num_scenarios, n))
+    section_scores = np.empty((num_scenarios, n, num_sections))
+    for start in range(0, n, chunk_size):
+        stop = min(start + chunk_size, n)
+        correct = correct_counts[start:stop].astype(float)
+        incorrect = incorrect_counts[start:stop].astype(float)
+
+        # (scenarios, n, sections): adjusted section scores under each penalty
+        adjusted = np.maximum(0, correct[None] - penalties[:, None, None] * incorrect[None])
+        # Weights of each student's own career path: (scenarios, n, sections)
+        own_weights = np.transpose(weights, (0, 2, 1))[:, career_index[start:stop], :]
+        section_scores[:, start:stop] = adjusted * own_weights
+        totals[:, start:stop] = section_scores[:, start:stop].sum(axis=2)
+
+    return totals, section_scores
+
+def evaluate_scenarios(counts, names, weights, penalties, vacancies=None):
+    """
+    Rank and admit the whole cohort under every scenario.
+    Returns a per-student ranking DataFrame (score, merit position and
+    admission under each scenario) and a per-scenario, per-area summary of
+    cut-offs and admission changes against the base scenario
+    """
+    vacancies = VACANCIES if vacancies is None else vacancies
+    careers = counts['careers']
+    areas = np.array([CAREER_PATHS[career] for career in careers], dtype=object)
+    totals, section_scores = score_scenarios(counts['correct'], counts['incorrect'], careers, weights, penalties)
+    area_vacancies = np.array([vacancies.get(area, 0) for area in areas])
+
+    ranking = pd.DataFrame({'codigo_estudiante': counts['codes'], 'dni_estudiante': counts['dnis'], 'area_postulada': areas})
+    admitted = np.empty((len(names), len(areas)), dtype=bool)
+
+    # Integer codes for areas and LITHOs, so every scenario ranks on plain integers
+    _, area_ids = np.unique(areas.astype(str), return_inverse=True)
+    _, code_ids = np.unique(counts['codes'], return_inverse=True)
+    for k, name in enumerate(names):
+        ranks = rank_applicants(area_ids, careers, totals[k], section_scores[k], code_ids)
+        admitted[k] = ranks <= area_vacancies
+        ranking[f'puntaje_{name}'] = np.round(totals[k], 4)
+        ranking[f'orden_{name}'] = ranks
+        ranking[f'admitido_{name}'] = admitted[k]
+
+    summary = []
+    for k, name in enumerate(names):
+        for area in vacancies:
+            in_area = areas == area
+            area_admitted = admitted[k] & in_area
+            summary.append({
+                'escenario': name,
+                'penalidad': penalties[k],
+                'area_postulada': area,
+                'admitidos': int(area_admitted.sum()),
+                'puntaje_corte': round(totals[k][area_admitted].min(), 4) if area_admitted.any() else None,
+                'ingresan': int((area_admitted & ~admitted[0]).sum()),
+                'salen': int((admitted[0] & in_area & ~admitted[k]).sum())
+            })
+
+    return ranking, pd.DataFrame(summary)
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate alternative weight and penalty schemes on the cached section counts")
+    parser.add_argument('scenarios', help="JSON file with the list of scenarios")
+    parser.add_argument('--counts', help=f"section counts cache (default: the grader's output/{SECTION_COUNTS_FILE})")
+    parser.add_argument('--output-dir', help="where to write the scenario results (default: output/)")
+    args = parser.parse_args()
+
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    grader_output_dir = os.path.join(script_dir, "output")
+    output_dir = args.output_dir or grader_output_dir
+    # The counts are where the grader wrote them, wherever the scenario results go
+    counts_path = args.counts or os.path.join(grader_output_dir, SECTION_COUNTS_FILE)
+    if not os.path.exists(counts_path):
+        print(f"Error: Section counts not found at {counts_path}; run the grader first")
+        return
+
+    counts = load_section_counts(counts_path)
+    names, weights, penalties = load_scenarios(args.scenarios)
+    ranking, summary = evaluate_scenarios(counts, names, weights, penalties)
+
+    os.makedirs(output_dir, exist_ok=True)
+    ranking_path = os.path.join(output_dir, "escenarios_ranking.csv")
+    summary_path = os.path.join(output_dir, "escenarios_resumen.csv")
+    ranking.to_csv(ranking_path, index=False)
+    summary.to_csv(summary_path, index=False)
+
+    print(summary.to_string(index=False))
+    print(f"Scenario rankings saved to {ranking_path}")
+    print(f"Scenario summary saved to {summary_path}")
+
+if __name__ == "__main__":
+    main()
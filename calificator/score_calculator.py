@@ -1,4 +1,7 @@
-from config import EXAM_STRUCTURE, CAREER_PATHS
+import numpy as np
+
+from config import EXAM_STRUCTURE, CAREER_PATHS, BLANK_CODE, WRONG_ANSWER_PENALTY
+from response_matrix import correct_matrix
 
 def calculate_score(student_answers, correct_answers, career_path):
     """
@@ -38,7 +41,7 @@ def calculate_score(student_answers, correct_answers, career_path):
                     incorrect_count += 1
         
         # Apply the formula for this section: [Nº Respuestas Buenas - 1/4 (Nº Resp. Malas)]
-        section_adjusted = correct_count - (0.25 * incorrect_count)
+        section_adjusted = correct_count - (WRONG_ANSWER_PENALTY * incorrect_count)
         section_adjusted = max(0, section_adjusted)  # Ensure it's not negative
         
         # Store section counts and adjusted score for reporting
@@ -78,7 +81,7 @@ def calculate_score(student_answers, correct_answers, career_path):
         total_unanswered += unanswered_count
     
     # Calculate the overall adjusted score (for reporting purposes)
-    adjusted_total = total_correct - (0.25 * total_incorrect)
+    adjusted_total = total_correct - (WRONG_ANSWER_PENALTY * total_incorrect)
     adjusted_total = max(0, adjusted_total)  # Ensure it's not negative
     
     return career_scores, section_scores, {
@@ -95,3 +98,35 @@ def calculate_vigesimal_score(raw_score):
     """
     vigesimal_score = (20 * (raw_score + 45)) / (360 + 45)
     return round(vigesimal_score, 2)  # Round to 2 decimal places
+
+def section_weight_matrix():
+    """Weights as a (sections x career paths) matrix, in EXAM_STRUCTURE and CAREER_PATHS order"""
+    return np.array([[details["weights"][path] for path in CAREER_PATHS] for details in EXAM_STRUCTURE.values()], dtype=float)
+
+def count_section_answers(responses, keys):
+    """
+    Count correct and incorrect answers per section for a whole response
+    matrix at once, with the same rules as calculate_score.
+    responses and keys are (n, 100) answer code matrices (keys holds each
+    student's key row); returns two (n, sections) integer matrices
+    """
+    correct = correct_matrix(responses, keys)
+    incorrect = (responses != BLANK_CODE) & ~correct
+
+    correct_counts = np.empty((len(responses), len(EXAM_STRUCTURE)), dtype=np.int64)
+    incorrect_counts = np.empty_like(correct_counts)
+    for s, details in enumerate(EXAM_STRUCTURE.values()):
+        columns = slice(details["start"], details["end"] + 1)
+        correct_counts[:, s] = correct[:, columns].sum(axis=1)
+        incorrect_counts[:, s] = incorrect[:, columns].sum(axis=1)
+    return correct_counts, incorrect_counts
+
+def calculate_scores_batch(correct_counts, incorrect_counts, weights=None, penalty=WRONG_ANSWER_PENALTY):
+    """
+    Vectorized calculate_score over per-section counts.
+    Returns the adjusted section scores (n, sections) and the career path
+    scores (n, career paths)
+    """
+    weights = section_weight_matrix() if weights is None else weights
+    adjusted = np.maximum(0, correct_counts - penalty * incorrect_counts)
+    return adjusted, adjusted @ weights
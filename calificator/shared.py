@@ -0,0 +1,19 @@
+import os
+import functools
+import importlib.util
+
+GENERATOR_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "exam_generator")
+
+@functools.lru_cache(maxsize=None)
+def load_generator_module(name):
+    """
+    Load one of the exam generator's self-contained modules (e.g. config).
+    Mirror of exam_generator/shared.py: both tools have modules with the
+    same names (config, main), so it is loaded by path under a prefixed
+    name instead of through sys.path
+    """
+    module_name = f"exam_generator_{name}"
+    spec = importlib.util.spec_from_file_location(module_name, os.path.join(GENERATOR_DIR, f"{name}.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
@@ -0,0 +1,56 @@
+import numpy as np
+
+from config import CAREER_PATHS, SECTION_COLUMNS
+from admission import AdmissionSelector, merit_key
+
+def random_results(count, seed):
+    rng = np.random.default_rng(seed)
+    results = []
+    for i in rng.permutation(count):
+        career = str(rng.choice(list(CAREER_PATHS)))
+        result = {
+            'codigo_estudiante': f"{i:06d}",
+            'carrera_asignada': career,
+            'area_postulada': CAREER_PATHS[career],
+            # Few distinct values, so scores and section scores tie often
+            'puntaje_total': float(rng.integers(0, 5))
+        }
+        for column in SECTION_COLUMNS.values():
+            result[column] = float(rng.integers(0, 3))
+        results.append(result)
+    return results
+
+def test_selection_matches_a_full_sort():
+    results = random_results(2000, seed=7)
+    vacancies = {'Ciencias': 30, 'Humanidades': 5, 'Ingeniería': 0}
+    selector = AdmissionSelector(vacancies, waitlist_size=10)
+    for result in results:
+        selector.add(result)
+
+    expected = sorted(results, key=merit_key)
+    admitted, waitlist, cutoffs = selector.results()
+    for area, area_vacancies in vacancies.items():
+        best = [r['codigo_estudiante'] for r in expected if r['area_postulada'] == area][:area_vacancies + 10]
+        assert [r['codigo_estudiante'] for r in selector.ranked(area)] == best
+        assert [r['codigo_estudiante'] for r in admitted if r['area_postulada'] == area] == best[:area_vacancies]
+        assert [r['codigo_estudiante'] for r in waitlist if r['area_postulada'] == area] == best[area_vacancies:]
+
+    cutoff = {c['area_postulada']: c['puntaje_corte'] for c in cutoffs}
+    assert cutoff['Ciencias'] == [r for r in expected if r['area_postulada'] == 'Ciencias'][29]['puntaje_total']
+    # No vacancies, no cut-off
+    assert cutoff['Ingeniería'] is None
+
+def test_ties_go_to_the_career_section_then_the_lowest_litho():
+    sections = dict.fromkeys(SECTION_COLUMNS.values(), 0.0)
+    base = {'carrera_asignada': 'A', 'area_postulada': 'Ciencias', 'puntaje_total': 10.0}
+    rows = [
+        {**base, **sections, 'codigo_estudiante': '000003'},
+        {**base, **sections, 'codigo_estudiante': '000002'},
+        # Ciencias Naturales breaks the tie for career A before Matemática
+        {**base, **sections, 'codigo_estudiante': '000009', SECTION_COLUMNS['Ciencias Naturales']: 1.0},
+        {**base, **sections, 'codigo_estudiante': '000001', SECTION_COLUMNS['Matemática']: 5.0},
+    ]
+    selector = AdmissionSelector({'Ciencias': 2}, waitlist_size=1)
+    for row in rows:
+        selector.add(row)
+    assert [r['codigo_estudiante'] for r in selector.ranked('Ciencias')] == ['000009', '000001', '000002']
@@ -0,0 +1,29 @@
+from config import BLANK_CODE
+from answer_keys import load_answer_key_table, compiled_key_path
+
+def test_missing_keys_file_gives_an_empty_table(tmp_path):
+    for name in ("CLAVES.DBF", "keys.txt"):
+        keys_path = str(tmp_path / name)
+        table = load_answer_key_table(keys_path)
+        assert len(table) == 0
+        assert not (tmp_path / compiled_key_path(keys_path)).exists()
+
+def test_failed_load_is_not_cached(tmp_path):
+    keys_path = tmp_path / "keys.txt"
+    keys_path.write_text("\n")
+    assert len(load_answer_key_table(str(keys_path))) == 0
+    assert not (tmp_path / compiled_key_path(str(keys_path))).exists()
+
+    # Fixing the file takes effect on the next run
+    keys_path.write_text("M" + "A" * 100 + "\n")
+    assert list(load_answer_key_table(str(keys_path)).key_temas) == ['M']
+
+def test_invalid_key_cells_are_never_correct(tmp_path):
+    keys_path = tmp_path / "keys.txt"
+    keys_path.write_text("M*" + "a" + "A" * 98 + "\nN" + "A" * 99 + "\n")
+    table = load_answer_key_table(str(keys_path), use_cache=False)
+
+    # Only the key with the wrong length is rejected
+    assert list(table.key_temas) == ['M']
+    assert table.key_matrix[0, :3].tolist() == [BLANK_CODE, BLANK_CODE, 1]
+    assert table.as_dict()['M'][:3] == ['', '', 'A']
@@ -0,0 +1,41 @@
+import numpy as np
+
+from config import NUM_CODES, NUM_QUESTIONS
+from answer_keys import AnswerKeyTable
+from archive import PACKED_WIDTH, pack_responses, unpack_responses, write_archive, ResponseArchive
+from response_matrix import decode_answers
+
+def random_sheets(count, seed):
+    rng = np.random.default_rng(seed)
+    lithos = np.array([f"{litho:06d}" for litho in rng.permutation(999999)[:count]])
+    temas = rng.choice(['M', 'N', 'X'], size=count).astype('U1')
+    responses = rng.integers(0, NUM_CODES, size=(count, NUM_QUESTIONS)).astype(np.uint8)
+    return lithos, temas, responses
+
+def test_pack_round_trip():
+    _, _, responses = random_sheets(500, seed=1)
+    packed = pack_responses(responses)
+    assert packed.shape == (500, PACKED_WIDTH)
+    assert np.array_equal(unpack_responses(packed), responses)
+
+def test_archive_round_trip(tmp_path):
+    lithos, temas, responses = random_sheets(1000, seed=2)
+    key_table = AnswerKeyTable(['M', 'N'], responses[:2])
+    archive_path = str(tmp_path / "respuestas.lga")
+    # A block size that leaves a short last block
+    write_archive(archive_path, lithos, temas, responses, key_table, label='2025-1', block_size=128)
+
+    with ResponseArchive(archive_path) as archive:
+        assert len(archive) == 1000
+        assert archive.header['label'] == '2025-1'
+        assert np.array_equal(archive.key_table.key_matrix, key_table.key_matrix)
+
+        blocks = list(archive.iter_blocks())
+        assert len(blocks) == 8
+        assert np.array_equal(np.concatenate([block[0] for block in blocks]), lithos)
+        assert np.array_equal(np.concatenate([block[1] for block in blocks]), temas)
+        assert np.array_equal(np.concatenate([block[2] for block in blocks]), responses)
+
+        for row in (0, 127, 128, 999):
+            assert archive.find(lithos[row]) == (temas[row], decode_answers(responses[row]).tolist())
+        assert archive.find('1000000') is None
@@ -0,0 +1,34 @@
+import numpy as np
+
+from config import NUM_QUESTIONS, COPY_DETECTION
+from copy_detection import detect_similar_sheets
+
+def test_near_copies_just_above_the_threshold_are_found():
+    rng = np.random.default_rng(7)
+    num_sheets, num_copies, num_wrong = 400, 40, 30
+    key = rng.integers(1, 6, NUM_QUESTIONS).astype(np.uint8)
+
+    # Honest sheets: num_wrong random wrong answers each, the rest correct
+    responses = np.tile(key, (num_sheets, 1))
+    for sheet in range(num_sheets):
+        wrong = rng.choice(NUM_QUESTIONS, num_wrong, replace=False)
+        responses[sheet, wrong] = (key[wrong] + rng.integers(1, 5, num_wrong) - 1) % 5 + 1
+
+    # Every copy repeats its source but fixes 11 of the wrong answers:
+    # 19 shared of 30 wrong answers, Jaccard 0.63 (just over min_similarity)
+    keep = int(np.ceil(COPY_DETECTION["min_similarity"] * num_wrong)) + 1
+    planted = set()
+    for copy in range(num_copies):
+        source = num_copies + copy
+        responses[copy] = responses[source]
+        wrong = np.flatnonzero(responses[copy] != key)
+        fixed = rng.choice(wrong, len(wrong) - keep, replace=False)
+        responses[copy, fixed] = key[fixed]
+        planted.add((f"{copy:06d}", f"{source:06d}"))
+
+    lithos = np.array([f"{sheet:06d}" for sheet in range(num_sheets)])
+    temas = np.full(num_sheets, 'M')
+    suspects = detect_similar_sheets(lithos, temas, responses, np.array(['M']), key[None, :])
+
+    found = set(zip(suspects['codigo_1'], suspects['codigo_2']))
+    assert planted <= found
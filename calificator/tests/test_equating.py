@@ -0,0 +1,22 @@
+import numpy as np
+
+from equating import ScoreEquating
+
+def test_mean_sigma_reproduces_the_reference_mean_and_deviation():
+    rng = np.random.default_rng(11)
+    temas = np.repeat(['M', 'N', 'X'], [3000, 2000, 1000])
+    careers = np.repeat(['A', 'A', 'C'], [3000, 2000, 1000])
+    # N is a harder form of the same career as M; X belongs to another career
+    scores = np.concatenate([rng.normal(200, 30, 3000), rng.normal(150, 20, 2000), rng.normal(220, 30, 1000)])
+
+    equating = ScoreEquating('mean_sigma')
+    for start in range(0, len(scores), 1500):
+        equating.update(temas[start:start + 1500], careers[start:start + 1500], scores[start:start + 1500])
+    equated = equating.transform(temas, scores)
+
+    career_a = careers == 'A'
+    for tema in ('M', 'N'):
+        assert np.isclose(equated[temas == tema].mean(), scores[career_a].mean(), atol=1e-3)
+        assert np.isclose(equated[temas == tema].std(), scores[career_a].std(), atol=1e-3)
+    # The only form of its career is its own reference
+    assert np.allclose(equated[temas == 'X'], scores[temas == 'X'], atol=1e-3)
@@ -0,0 +1,31 @@
+import numpy as np
+
+from config import NUM_QUESTIONS
+from item_analysis import ItemAnalysis
+
+def test_statistics_match_a_direct_computation():
+    rng = np.random.default_rng(3)
+    key_temas = np.array(['M', 'N'])
+    key_matrix = rng.integers(1, 6, size=(2, NUM_QUESTIONS)).astype(np.uint8)
+    temas = rng.choice(['M', 'N', 'Q'], size=600).astype('U1')
+    # Codes 0-6: blank, A-E and invalid marks; about half of the answers are correct
+    responses = rng.integers(0, 7, size=(600, NUM_QUESTIONS)).astype(np.uint8)
+    rows = np.where(temas == 'N', 1, 0)
+    responses = np.where(rng.random(responses.shape) < 0.5, key_matrix[rows], responses)
+
+    analysis = ItemAnalysis(key_temas, key_matrix)
+    # Chunks of any size give the same statistics
+    for start in range(0, len(temas), 170):
+        analysis.update(temas[start:start + 170], responses[start:start + 170])
+    stats = analysis.statistics()
+
+    for row, tema in enumerate(key_temas):
+        correct = responses[temas == tema] == key_matrix[row]
+        scores = correct.sum(axis=1)
+        tema_stats = stats[stats['tema'] == tema]
+        assert (tema_stats['examinados'] == (temas == tema).sum()).all()
+        assert np.allclose(tema_stats['dificultad'], np.round(correct.mean(axis=0), 4))
+        expected = [np.corrcoef(correct[:, q], scores)[0, 1] for q in range(NUM_QUESTIONS)]
+        assert np.allclose(tema_stats['discriminacion'], np.round(expected, 4), atol=1e-4)
+        for code, option in enumerate('ABCDE', start=1):
+            assert (tema_stats[f'opcion_{option}'].to_numpy() == (responses[temas == tema] == code).sum(axis=0)).all()
@@ -0,0 +1,19 @@
+import numpy as np
+
+from lsh import lsh_candidate_pairs
+
+def test_pairs_share_a_band():
+    signatures = np.array([
+        [1, 2, 3, 4],
+        [1, 2, 9, 9],  # shares the first band with row 0
+        [7, 7, 3, 4],  # shares the second band with row 0
+        [5, 6, 8, 8],
+    ], dtype=np.uint32)
+    first, second = lsh_candidate_pairs(signatures, bands=2, max_bucket_size=10)
+    assert sorted(zip(first.tolist(), second.tolist())) == [(0, 1), (0, 2)]
+
+def test_large_buckets_are_skipped(capsys):
+    signatures = np.zeros((5, 4), dtype=np.uint32)
+    first, _ = lsh_candidate_pairs(signatures, bands=2, max_bucket_size=3, unit='sheets')
+    assert len(first) == 0
+    assert "larger than 3 sheets" in capsys.readouterr().out
@@ -0,0 +1,37 @@
+import pandas as pd
+
+from config import SECTION_COLUMNS
+from admission import rank_applicants
+from merge_results import merge_site_results, sort_shard
+
+def _site(codes, careers, totals, sections):
+    rows = []
+    for code, career, total, section in zip(codes, careers, totals, sections):
+        rows.append({'codigo_estudiante': code, 'dni_estudiante': '', 'carrera_asignada': career,
+                     **dict(zip(SECTION_COLUMNS.values(), section)), 'area_postulada': 'Ciencias', 'puntaje_total': total})
+    return pd.DataFrame(rows)
+
+def test_national_positions_use_admission_tie_breaks(tmp_path):
+    # Equal totals; career A breaks ties on Ciencias Naturales before LITHO
+    first = _site(['000001', '000003'], ['A', 'A'], [100.0, 100.0], [(10, 20, 0, 0), (10, 40, 0, 0)])
+    second = _site(['000002', '000004'], ['A', 'A'], [100.0, 120.0], [(10, 30, 0, 0), (0, 0, 0, 0)])
+    paths = []
+    for name, site in (('a', first), ('b', second)):
+        path = tmp_path / f"{name}.csv"
+        site.to_csv(path, index=False)
+        paths.append(path)
+    originals = [path.read_text() for path in paths]
+
+    sorted_paths = [sort_shard(str(path), str(tmp_path / "ordenadas" / path.name)) for path in paths]
+    output_path = tmp_path / "ranking.csv"
+    merge_site_results([f"{path.stem}={sorted_path}" for path, sorted_path in zip(paths, sorted_paths)],
+                       str(output_path), str(tmp_path / "duplicados.csv"))
+
+    # Site files are left untouched
+    assert [path.read_text() for path in paths] == originals
+
+    ranking = pd.read_csv(output_path, dtype={'codigo_estudiante': str})
+    assert list(ranking['codigo_estudiante']) == ['000004', '000003', '000002', '000001']
+    ranks = rank_applicants(ranking['area_postulada'], ranking['carrera_asignada'], ranking['puntaje_total'],
+                            ranking[list(SECTION_COLUMNS.values())], ranking['codigo_estudiante'])
+    assert list(ranks) == list(ranking['orden_merito_nacional'])
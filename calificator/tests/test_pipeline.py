@@ -0,0 +1,52 @@
+import os
+from concurrent.futures import Future
+import numpy as np
+
+from answer_keys import load_answer_key_table
+from archive import ResponseArchive
+from pipeline import GradingPipeline
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+def test_failed_run_keeps_previous_results(tmp_path):
+    keys_path = tmp_path / "keys.txt"
+    keys_path.write_text("M" + "A" * 100 + "\n")
+    output_path = tmp_path / "resultados.csv"
+    detailed_path = tmp_path / "resultados_detallados.csv"
+    output_path.write_text("anterior\n")
+    detailed_path.write_text("anterior\n")
+
+    student_ids = Future()
+    student_ids.set_result({})
+    pipeline = GradingPipeline(os.path.join(DATA_DIR, "RESPUEST.DBF"), load_answer_key_table(str(keys_path), use_cache=False),
+                               str(output_path), student_ids, workers=1, chunk_size=50)
+
+    def failing_score():
+        pipeline.read_queue.get()
+        raise ValueError("scoring failed")
+    pipeline._score = failing_score
+
+    assert not pipeline.run()
+    assert output_path.read_text() == "anterior\n"
+    assert detailed_path.read_text() == "anterior\n"
+    assert sorted(os.listdir(tmp_path)) == ["keys.txt", "resultados.csv", "resultados_detallados.csv"]
+
+def test_pipelined_run_writes_the_same_files(tmp_path):
+    from main import grade_exams
+    from pipeline import grade_exams_pipelined
+
+    paths = [os.path.join(DATA_DIR, name) for name in ("RESPUEST.DBF", "CLAVES.DBF", "IDENTIFI.DBF")]
+    grade_exams(*paths, str(tmp_path / "secuencial" / "resultados.csv"))
+    grade_exams_pipelined(*paths, str(tmp_path / "pipeline" / "resultados.csv"), workers=2, chunk_size=50)
+
+    for name in ("resultados.csv", "resultados_detallados.csv", "admitidos.csv", "analisis_items.csv",
+                 "copias_sospechosas.csv", "indice_resultados.npy"):
+        assert (tmp_path / "secuencial" / name).read_bytes() == (tmp_path / "pipeline" / name).read_bytes(), name
+
+    # Archives are named and labelled after the run time, so compare their sheets
+    archives = [ResponseArchive(str(next((tmp_path / mode).glob("respuestas_*.lga")))) for mode in ("secuencial", "pipeline")]
+    for sequential, pipelined in zip(*(archive.iter_blocks() for archive in archives)):
+        for expected, actual in zip(sequential, pipelined):
+            assert np.array_equal(expected, actual)
+    for archive in archives:
+        archive.close()
@@ -0,0 +1,56 @@
+import os
+import numpy as np
+import pandas as pd
+
+from results_service import RESULTS_INDEX_FILE, build_results_index
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+def test_empty_detailed_results_build_no_index(tmp_path):
+    detailed_path = tmp_path / "resultados_detallados.csv"
+    detailed_path.write_text("\n")
+    # An index left by an earlier run must not keep serving its results
+    np.save(tmp_path / RESULTS_INDEX_FILE, np.zeros(1))
+
+    assert build_results_index(str(detailed_path), str(tmp_path)) is None
+    assert not (tmp_path / RESULTS_INDEX_FILE).exists()
+
+def test_missing_detailed_results_build_no_index(tmp_path):
+    assert build_results_index(str(tmp_path / "resultados_detallados.csv"), str(tmp_path)) is None
+
+def test_grading_finishes_when_no_sheet_has_a_key(tmp_path):
+    from main import grade_exams
+
+    # The only key is for a TEMA that no answer sheet uses
+    keys_path = tmp_path / "keys.txt"
+    keys_path.write_text("Q" + "A" * 100 + "\n")
+    output_path = tmp_path / "output" / "resultados.csv"
+
+    grade_exams(os.path.join(DATA_DIR, "RESPUEST.DBF"), str(keys_path), os.path.join(DATA_DIR, "IDENTIFI.DBF"), str(output_path))
+
+    assert output_path.exists()
+    assert not (tmp_path / "output" / RESULTS_INDEX_FILE).exists()
+
+def test_roster_keeps_sheets_without_or_sharing_a_dni(tmp_path, capsys):
+    from pipeline import DETAILED_COLUMNS
+    from report_generator import generate_roster_pdf
+    from results_service import load_result_records
+
+    detailed = pd.DataFrame(0.0, index=range(4), columns=DETAILED_COLUMNS)
+    detailed['codigo_estudiante'] = ['000001', '000002', '000003', '000004']
+    detailed['dni_estudiante'] = ['', '', '70000001', '70000001']
+    detailed['tipo_examen'] = 'M'
+    detailed['carrera_asignada'] = 'A'
+    detailed['area_postulada'] = 'Ciencias'
+    detailed['puntaje_total'] = [40.0, 30.0, 20.0, 10.0]
+    detailed_path = tmp_path / "resultados_detallados.csv"
+    detailed.to_csv(detailed_path, index=False)
+
+    records = load_result_records(str(detailed_path))
+    assert records['orden_merito'].tolist() == [1, 2, 3, 4]
+    assert records['postulantes'].tolist() == [4, 4, 4, 4]
+    # The lookup index only holds the best result of each DNI
+    assert len(np.load(build_results_index(str(detailed_path), str(tmp_path)))) == 1
+
+    generate_roster_pdf(str(detailed_path), str(tmp_path / "padron_resultados.pdf"))
+    assert "Results roster of 4 applicants" in capsys.readouterr().out
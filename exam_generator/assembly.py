@@ -0,0 +1,260 @@
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+from config import FILE_MAPPING, EXAM_STRUCTURE, BLUEPRINT
+from item_bank import ItemBank
+
+def subject_counts(exam_structure=EXAM_STRUCTURE):
+    """(subject, number of questions) pairs in exam order"""
+    return [(subject, count) for subjects in exam_structure.values() for subject, count in subjects.items()]
+
+def band_targets(num_questions, shares, bands):
+    """Items per difficulty band in one form (largest remainder rounding)"""
+    exact = np.array([shares.get(band, 0) for band in bands], dtype=float)
+    exact = exact / exact.sum() * num_questions
+    targets = np.floor(exact).astype(np.int64)
+    targets[np.argsort(targets - exact)[:num_questions - targets.sum()]] += 1
+    return targets
+
+class FormAssembler:
+    """
+    Greedy assembly of parallel forms with repair.
+
+    For every form, subjects are filled scarcest first, picking one item at a
+    time among the ones still allowed (not in the form, under the reuse
+    limit, topic tag under its limit) and preferring difficulty bands the
+    form still needs and items used in fewer forms. A repair pass then swaps
+    items within a subject until every band is within tolerance of its
+    target. Limits are only relaxed when a subject has no allowed item left,
+    and every relaxation is counted in the form report.
+    """
+
+    def __init__(self, bank, blueprint=BLUEPRINT, exam_structure=EXAM_STRUCTURE, seed=None):
+        self.bank = bank
+        self.blueprint = blueprint
+        self.rng = np.random.default_rng(seed)
+        self.usage = np.zeros(len(bank), dtype=np.int64)
+
+        counts = [(bank.subjects.index(subject), count) for subject, count in subject_counts(exam_structure)]
+        self.counts = counts
+        self.num_questions = sum(count for _, count in counts)
+        self.targets = band_targets(self.num_questions, blueprint["band_shares"], bank.bands)
+        # Each subject also aims at the band shares, so no band of a subject is used up first
+        self.subject_targets = [band_targets(count, blueprint["band_shares"], bank.bands) for _, count in counts]
+        # Scarcest subjects first: fewest items per question to fill
+        self.fill_order = sorted(range(len(counts)), key=lambda k: len(bank.by_subject[counts[k][0]]) / max(counts[k][1], 1))
+
+    def _allowed(self, pool, chosen, tag_counts, reuse=True, tags=True):
+        allowed = ~chosen[pool]
+        if reuse:
+            allowed &= self.usage[pool] < self.blueprint["max_item_reuse"]
+        if tags:
+            pool_tags = self.bank.tag_ids[pool]
+            allowed &= (pool_tags < 0) | (tag_counts[np.maximum(pool_tags, 0)] < self.blueprint["max_per_tag"])
+        return allowed
+
+    def _pick(self, k, chosen, band_counts, tag_counts, violations):
+        subject_id, count = self.counts[k]
+        pool = self.bank.by_subject[subject_id]
+        subject_band_counts = np.zeros(len(self.bank.bands), dtype=np.int64)
+        max_per_tag = self.blueprint["max_per_tag"]
+
+        # Within each band, least used first and at random among equals; usage
+        # does not change while a form is built, so this order is computed once
+        allowed = self._allowed(pool, chosen, tag_counts)
+        queues = []
+        for band_id in range(len(self.bank.bands)):
+            candidates = pool[allowed & (self.bank.band_ids[pool] == band_id)]
+            queues.append(candidates[np.argsort(self.usage[candidates] + self.rng.random(len(candidates)))])
+        heads = [0] * len(queues)
+
+        picked = []
+        for _ in range(count):
+            # Band the subject needs first, then one the form needs
+            preference = np.lexsort((self.targets <= band_counts, self.subject_targets[k] <= subject_band_counts))
+            item = None
+            for band_id in preference:
+                queue = queues[band_id]
+                while heads[band_id] < len(queue):
+                    candidate = queue[heads[band_id]]
+                    heads[band_id] += 1
+                    tag = self.bank.tag_ids[candidate]
+                    if not chosen[candidate] and (tag < 0 or tag_counts[tag] < max_per_tag):
+                        item = candidate
+                        break
+                if item is not None:
+                    break
+
+            # No allowed item left in the subject: relax the reuse limit, then the tag limit
+            if item is None:
+                for reuse, tags, violation in ((False, True, 'reutilizacion'), (False, False, 'etiquetas')):
+                    violations[violation] += 1
+                    relaxed = self._allowed(pool, chosen, tag_counts, reuse=reuse, tags=tags)
+                    if relaxed.any():
+                        candidates = pool[relaxed]
+                        item = candidates[np.argmin(self.usage[candidates] + self.rng.random(len(candidates)))]
+                        break
+            if item is None:
+                violations['faltantes'] += 1
+                continue
+
+            chosen[item] = True
+            band_counts[self.bank.band_ids[item]] += 1
+            subject_band_counts[self.bank.band_ids[item]] += 1
+            if self.bank.tag_ids[item] >= 0:
+                tag_counts[self.bank.tag_ids[item]] += 1
+            picked.append(item)
+        return picked
+
+    def _repair(self, selections, chosen, band_counts, tag_counts):
+        """
+        Swap items within a subject from bands over target to bands under it.
+        Every (over, under) band pair is tried, widest gap first; each swap
+        lowers the total deviation, so the loop ends when the form is within
+        tolerance or no pair can be improved
+        """
+        tolerance = self.blueprint["band_tolerance"]
+        swaps = 0
+        while True:
+            excess = band_counts - self.targets
+            if np.abs(excess).max() <= tolerance:
+                return swaps
+            pairs = sorted(((over, under) for over in np.flatnonzero(excess > 0) for under in np.flatnonzero(excess < 0)),
+                           key=lambda pair: excess[pair[1]] - excess[pair[0]])
+            if not any(self._swap(selections, chosen, band_counts, tag_counts, int(over), int(under)) for over, under in pairs):
+                return swaps
+            swaps += 1
+
+    def _swap(self, selections, chosen, band_counts, tag_counts, over, under):
+        """Replace one item of band over with an allowed item of band under in the same subject"""
+        for k in self.rng.permutation(len(selections)):
+            subject_id = self.counts[k][0]
+            candidates = self.bank.by_subject_band[(subject_id, under)]
+            outgoing = [position for position, item in enumerate(selections[k]) if self.bank.band_ids[item] == over]
+            if not outgoing or not len(candidates):
+                continue
+            position = outgoing[self.rng.integers(len(outgoing))]
+            item = selections[k][position]
+
+            # The outgoing item's tag slot is freed before checking the incoming one
+            if self.bank.tag_ids[item] >= 0:
+                tag_counts[self.bank.tag_ids[item]] -= 1
+            allowed = self._allowed(candidates, chosen, tag_counts)
+            if not allowed.any():
+                if self.bank.tag_ids[item] >= 0:
+                    tag_counts[self.bank.tag_ids[item]] += 1
+                continue
+            allowed_items = candidates[allowed]
+            replacement = allowed_items[np.argmin(self.usage[allowed_items] + self.rng.random(len(allowed_items)))]
+
+            chosen[item] = False
+            chosen[replacement] = True
+            if self.bank.tag_ids[replacement] >= 0:
+                tag_counts[self.bank.tag_ids[replacement]] += 1
+            band_counts[over] -= 1
+            band_counts[under] += 1
+            selections[k][position] = replacement
+            return True
+        return False
+
+    def assemble(self):
+        """Assemble one form; returns its item ids in exam order and its report row"""
+        chosen = np.zeros(len(self.bank), dtype=bool)
+        band_counts = np.zeros(len(self.bank.bands), dtype=np.int64)
+        tag_counts = np.zeros(max(len(self.bank.tag_names), 1), dtype=np.int64)
+        violations = {'reutilizacion': 0, 'etiquetas': 0, 'faltantes': 0}
+
+        selections = [[] for _ in self.counts]
+        for k in self.fill_order:
+            selections[k] = self._pick(k, chosen, band_counts, tag_counts, violations)
+        swaps = self._repair(selections, chosen, band_counts, tag_counts)
+
+        form = np.array([item for items in selections for item in items], dtype=np.int64)
+        self.usage[form] += 1
+        report = {'items': len(form), 'dificultad_media': round(float(self.bank.difficulty[form].mean()), 4) if len(form) else None}
+        report.update({band: int(band_counts[b]) for b, band in enumerate(self.bank.bands)})
+        report['desvio_bandas'] = int(np.abs(band_counts - self.targets).max())
+        report['intercambios'] = swaps
+        report.update(violations)
+        return form, report
+
+def assemble_forms(bank, num_forms, blueprint=BLUEPRINT, exam_structure=EXAM_STRUCTURE, seed=None, names=None):
+    """
+    Assemble num_forms parallel forms from the bank. Returns the item ids of
+    every form (in exam order) and a per-form report DataFrame
+    """
+    assembler = FormAssembler(bank, blueprint, exam_structure, seed)
+    names = names or [str(k + 1) for k in range(num_forms)]
+    forms = []
+    rows = []
+    for name in names:
+        form, report = assembler.assemble()
+        forms.append(form)
+        rows.append({'forma': name, **report})
+    return forms, pd.DataFrame(rows)
+
+def warn_off_blueprint(report, blueprint=BLUEPRINT):
+    """
+    Print a warning for every form outside the band tolerance or assembled
+    with relaxed limits. Returns the number of such forms
+    """
+    relaxations = {'reutilizacion': "over the reuse limit", 'etiquetas': "over the topic limit", 'faltantes': "missing"}
+    flagged = 0
+    for row in report.to_dict('records'):
+        problems = []
+        if row['desvio_bandas'] > blueprint["band_tolerance"]:
+            problems.append(f"difficulty bands off target by up to {row['desvio_bandas']} items (tolerance {blueprint['band_tolerance']})")
+        problems.extend(f"{row[column]} items {description}" for column, description in relaxations.items() if row[column])
+        if problems:
+            flagged += 1
+            print(f"Warning: Form {row['forma']} does not meet the blueprint: {'; '.join(problems)}")
+    return flagged
+
+def form_selections(bank, form):
+    """Turn a form's item ids into {subject: [CSV rows]} for generate_exam"""
+    selections = {}
+    for item in form:
+        selections.setdefault(bank.subjects[bank.subject_ids[item]], []).append(int(bank.row_ids[item]))
+    return selections
+
+def synthetic_bank(num_items, num_tags=8, seed=0):
+    """Random bank shaped like the real one (items per subject in proportion to the blueprint)"""
+    rng = np.random.default_rng(seed)
+    subjects = list(FILE_MAPPING)
+    counts = dict(subject_counts())
+    weights = np.array([counts.get(subject, 1) for subject in subjects], dtype=float)
+    subject_ids = np.sort(rng.choice(len(subjects), num_items, p=weights / weights.sum()))
+    row_ids = np.concatenate([np.arange((subject_ids == s).sum()) for s in range(len(subjects))])
+    difficulty = rng.beta(3, 2.5, num_items)
+    tags = np.array([f"tema_{t}" for t in range(num_tags)], dtype=object)[rng.integers(0, num_tags, num_items)]
+    return ItemBank(subjects, subject_ids, row_ids, difficulty, tags)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark blueprint-constrained form assembly on a synthetic bank")
+    parser.add_argument('--items', type=int, default=40000, help="items in the synthetic bank")
+    parser.add_argument('--forms', type=int, default=300, help="forms to assemble")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--report', help="write the per-form report to this CSV")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    bank = synthetic_bank(args.items, seed=args.seed)
+    indexed = time.perf_counter()
+    forms, report = assemble_forms(bank, args.forms, seed=args.seed)
+    assembled = time.perf_counter()
+
+    usage = np.bincount(np.concatenate(forms), minlength=len(bank))
+    print(f"Indexed {len(bank)} items in {indexed - start:.2f}s")
+    print(f"Assembled {args.forms} forms in {assembled - indexed:.2f}s ({(assembled - indexed) / args.forms * 1000:.1f} ms per form)")
+    print(f"Mean difficulty per form: {report['dificultad_media'].min():.4f} - {report['dificultad_media'].max():.4f}")
+    print(f"Largest band deviation: {report['desvio_bandas'].max()} (tolerance {BLUEPRINT['band_tolerance']})")
+    print(f"Most used item: {usage.max()} forms (limit {BLUEPRINT['max_item_reuse']}); relaxed limits: "
+          f"reuse {report['reutilizacion'].sum()}, tags {report['etiquetas'].sum()}, missing {report['faltantes'].sum()}")
+    if args.report:
+        report.to_csv(args.report, index=False)
+        print(f"Form report saved to {args.report}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+import os
+import re
+import time
+import hashlib
+import argparse
+import unicodedata
+import numpy as np
+import pandas as pd
+
+from config import FILE_MAPPING, BANK_LINT
+from shared import load_grader_module
+
+# LSH banding is shared with the grader's copy detection (calificator/lsh.py)
+lsh_candidate_pairs = load_grader_module("lsh").lsh_candidate_pairs
+
+SIGNATURE_CACHE_FILE = "firmas_banco.npz"
+_PRIME = np.uint64(1099511628211)
+
+_NON_WORD = re.compile(r'[\W_]+')
+_COMBINING_MARKS = re.compile('[\u0300-\u036f]')
+
+def normalize_text(text):
+    """Lowercase, drop accents and punctuation, collapse whitespace"""
+    text = _COMBINING_MARKS.sub('', unicodedata.normalize('NFKD', str(text).lower()))
+    return _NON_WORD.sub(' ', text).strip()
+
+def item_texts(questions):
+    """
+    Raw text (question and alternatives) of every bank item, with its
+    subject and CSV row, in FILE_MAPPING order
+    """
+    subjects, rows, texts = [], [], []
+    columns = ['question', 'alternative_a', 'alternative_b', 'alternative_c', 'alternative_d']
+    for subject in FILE_MAPPING:
+        if subject not in questions:
+            continue
+        df = questions[subject]
+        for row_id, values in enumerate(df[columns].itertuples(index=False)):
+            subjects.append(subject)
+            rows.append(row_id)
+            texts.append('\x1f'.join(str(value) for value in values))
+    return subjects, rows, texts
+
+def shingles(text, shingle_size):
+    text = text.ljust(shingle_size)
+    return {text[p:p + shingle_size] for p in range(len(text) - shingle_size + 1)}
+
+def minhash_signatures(texts, shingle_size, num_hashes, seed, chunk_size=4096):
+    """
+    MinHash signatures of the character shingle sets of many texts.
+    Each chunk of texts is laid out as one code point array; the shingle
+    hashes of all positions are computed at once (polynomial rolling hash)
+    and every hash function's minimum per text is a segmented reduction
+    """
+    rng = np.random.default_rng(seed)
+    multipliers = rng.integers(1, 2 ** 63, num_hashes, dtype=np.uint64) | np.uint64(1)
+    offsets = rng.integers(0, 2 ** 63, num_hashes, dtype=np.uint64)
+    signatures = np.empty((len(texts), num_hashes), dtype=np.uint32)
+
+    for start in range(0, len(texts), chunk_size):
+        chunk = [text.ljust(shingle_size) for text in texts[start:start + chunk_size]]
+        codes = np.frombuffer(''.join(chunk).encode('utf-32-le'), dtype=np.uint32).astype(np.uint64)
+        lengths = np.array([len(text) for text in chunk], dtype=np.int64)
+
+        num_positions = len(codes) - shingle_size + 1
+        rolling = np.zeros(num_positions, dtype=np.uint64)
+        for offset in range(shingle_size):
+            rolling = rolling * _PRIME + codes[offset:offset + num_positions]
+
+        # Keep the shingles that start and end inside the same text
+        counts = lengths - shingle_size + 1
+        segment_starts = np.cumsum(counts) - counts
+        text_starts = np.cumsum(lengths) - lengths
+        positions = np.repeat(text_starts - segment_starts, counts) + np.arange(counts.sum())
+        tokens = rolling[positions]
+        tokens = (tokens ^ (tokens >> np.uint64(32))) & np.uint64(0xFFFFFFFF)
+
+        # Multiply-shift hash family over the 32-bit shingle tokens
+        for h in range(num_hashes):
+            values = ((tokens * multipliers[h] + offsets[h]) >> np.uint64(32)).astype(np.uint32)
+            signatures[start:start + len(chunk), h] = np.minimum.reduceat(values, segment_starts)
+    return signatures
+
+def _cache_settings(settings):
+    return np.array([settings['shingle_size'], settings['num_hashes'], settings['seed']], dtype=np.int64)
+
+def cached_signatures(texts, settings, cache_path=None):
+    """
+    Signatures of every item text, reusing the cache of earlier runs.
+    Entries are keyed by a hash of the raw text, so only new or edited rows
+    are normalized and hashed again; the cache is rewritten with the current
+    rows only.
+    Returns the signatures and how many came from the cache
+    """
+    keys = np.array([hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest() for text in texts], dtype='S16')
+    signatures = np.empty((len(texts), settings['num_hashes']), dtype=np.uint32)
+    hit = np.zeros(len(texts), dtype=bool)
+
+    if cache_path and os.path.exists(cache_path):
+        with np.load(cache_path) as cache:
+            if np.array_equal(cache['settings'], _cache_settings(settings)) and len(cache['keys']):
+                position = np.minimum(np.searchsorted(cache['keys'], keys), len(cache['keys']) - 1)
+                hit = cache['keys'][position] == keys
+                signatures[hit] = cache['signatures'][position[hit]]
+
+    missing = np.flatnonzero(~hit)
+    if len(missing):
+        signatures[missing] = minhash_signatures([normalize_text(texts[i]) for i in missing], settings['shingle_size'], settings['num_hashes'], settings['seed'])
+
+    if cache_path:
+        unique_keys, first = np.unique(keys, return_index=True)
+        np.savez(cache_path, settings=_cache_settings(settings), keys=unique_keys, signatures=signatures[first])
+    return signatures, int(hit.sum())
+
+def connected_components(num_items, first, second):
+    """Cluster label (smallest member) of every item, linking each pair"""
+    labels = np.arange(num_items)
+    while True:
+        low = np.minimum(labels[first], labels[second])
+        merged = labels.copy()
+        np.minimum.at(merged, first, low)
+        np.minimum.at(merged, second, low)
+        merged = merged[merged]
+        if np.array_equal(merged, labels):
+            return labels
+        labels = merged
+
+def lint_bank(questions, settings=None, cache_path=None):
+    """
+    Find clusters of near-duplicate items across all subjects.
+    LSH candidates are confirmed with the exact Jaccard similarity of their
+    shingle sets. Returns one row per clustered item, the first item of each
+    cluster (in FILE_MAPPING and row order) marked as the one to keep
+    """
+    settings = {**BANK_LINT, **(settings or {})}
+    subjects, rows, texts = item_texts(questions)
+    columns = ['grupo', 'materia', 'archivo', 'fila', 'conservar', 'similitud_max', 'texto']
+    if len(texts) < 2:
+        return pd.DataFrame(columns=columns)
+
+    start = time.perf_counter()
+    signatures, cached = cached_signatures(texts, settings, cache_path)
+    first, second = lsh_candidate_pairs(signatures, settings['bands'], settings['max_bucket_size'])
+
+    similarity = np.array([
+        len(a & b) / len(a | b) for a, b in
+        ((shingles(normalize_text(texts[i]), settings['shingle_size']), shingles(normalize_text(texts[j]), settings['shingle_size'])) for i, j in zip(first, second))
+    ])
+    flagged = similarity >= settings['min_similarity'] if len(similarity) else np.zeros(0, dtype=bool)
+    first, second, similarity = first[flagged], second[flagged], similarity[flagged]
+    print(f"Linted {len(texts)} items ({len(texts) - cached} hashed, {cached} cached) in {time.perf_counter() - start:.2f}s: "
+          f"{len(flagged)} LSH candidates, {len(first)} near-duplicate pairs")
+    if len(first) == 0:
+        return pd.DataFrame(columns=columns)
+
+    labels = connected_components(len(texts), first, second)
+    best = np.zeros(len(texts))
+    np.maximum.at(best, first, similarity)
+    np.maximum.at(best, second, similarity)
+    members = np.flatnonzero(np.bincount(labels, minlength=len(texts))[labels] > 1)
+    members = members[np.argsort(labels[members], kind='stable')]
+
+    clusters = pd.DataFrame({
+        'grupo': pd.factorize(labels[members])[0] + 1,
+        'materia': [subjects[i] for i in members],
+        'archivo': [FILE_MAPPING[subjects[i]] for i in members],
+        'fila': [rows[i] for i in members],
+        'conservar': labels[members] == members,
+        'similitud_max': np.round(best[members], 4),
+        'texto': [texts[i].split('\x1f')[0][:120] for i in members]
+    })
+    return clusters[columns]
+
+def duplicate_rows(clusters):
+    """{subject: set of CSV rows} of every clustered item except the one kept"""
+    excluded = {}
+    for subject, row in zip(clusters['materia'][~clusters['conservar']], clusters['fila'][~clusters['conservar']]):
+        excluded.setdefault(subject, set()).add(int(row))
+    return excluded
+
+def save_bank_lint(clusters, output_dir):
+    """Write duplicados_banco.csv"""
+    os.makedirs(output_dir, exist_ok=True)
+    lint_file = os.path.join(output_dir, "duplicados_banco.csv")
+    clusters.to_csv(lint_file, index=False)
+    print(f"Found {clusters['grupo'].nunique() if len(clusters) else 0} near-duplicate groups, saved to {lint_file}")
+    return lint_file
+
+def main():
+    # Imported here, since main.py itself runs the lint
+    from main import load_questions
+
+    parser = argparse.ArgumentParser(description="Find near-duplicate items across the question bank")
+    parser.add_argument('--questions-dir', help="default: data/questions")
+    parser.add_argument('--output-dir', help="default: output/")
+    parser.add_argument('--no-cache', action='store_true', help="hash every item again")
+    args = parser.parse_args()
+
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    questions_dir = args.questions_dir or os.path.join(script_dir, "data", "questions")
+    output_dir = args.output_dir or os.path.join(script_dir, "output")
+    os.makedirs(output_dir, exist_ok=True)
+
+    clusters = lint_bank(load_questions(questions_dir), cache_path=None if args.no_cache else os.path.join(output_dir, SIGNATURE_CACHE_FILE))
+    save_bank_lint(clusters, output_dir)
+    if len(clusters):
+        print(clusters.drop(columns='texto').to_string(index=False))
+
+if __name__ == "__main__":
+    main()
@@ -52,4 +52,34 @@ FILE_MAPPING = {
     "HABILIDAD LÓGICO MATEMÁTICO": "logical_mathematical_skill_questions.csv"
 }
 
-EXAM_TYPES = ['I', 'J', 'K', 'L', 'M', 'N', 'O', 'P', 'Q']
\ No newline at end of file
+EXAM_TYPES = ['I', 'J', 'K', 'L', 'M', 'N', 'O', 'P', 'Q']
+
+# Blueprint for assembling balanced forms (assembly.py). Difficulty is the
+# proportion of examinees answering an item correctly, taken from the
+# grader's analisis_banco.csv or an optional 'difficulty' column in the
+# question files; 'tag' is an optional topic column.
+DIFFICULTY_BANDS = {
+    "DIFÍCIL": (0.0, 0.4),
+    "MEDIA": (0.4, 0.7),
+    "FÁCIL": (0.7, 1.0)
+}
+
+BLUEPRINT = {
+    "band_shares": {"DIFÍCIL": 0.3, "MEDIA": 0.4, "FÁCIL": 0.3},
+    "band_tolerance": 2,        # items a form may deviate from each band's target
+    "max_per_tag": 3,           # items of one topic tag in a form
+    "max_item_reuse": 3,        # forms an item may appear in
+    "default_difficulty": 0.55, # items without history or difficulty column
+    "min_examinees": 30         # history below this is not trusted
+}
+
+# Near-duplicate detection across the question files (bank_lint.py). Items
+# are compared by the character shingles of the question and alternatives.
+BANK_LINT = {
+    "shingle_size": 5,      # characters per shingle
+    "num_hashes": 64,
+    "bands": 16,            # LSH bands of num_hashes / bands rows
+    "min_similarity": 0.8,  # Jaccard similarity of the shingle sets
+    "max_bucket_size": 1000,
+    "seed": 2024
+}
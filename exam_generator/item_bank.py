@@ -0,0 +1,115 @@
+import os
+import numpy as np
+import pandas as pd
+
+from config import FILE_MAPPING, DIFFICULTY_BANDS, BLUEPRINT
+
+def difficulty_bands(difficulty):
+    """Band index (in DIFFICULTY_BANDS order) of every difficulty value"""
+    upper_bounds = np.array([high for _, high in DIFFICULTY_BANDS.values()])
+    return np.minimum(np.searchsorted(upper_bounds, difficulty, side='right'), len(upper_bounds) - 1).astype(np.int8)
+
+def load_difficulty_history(history_path, min_examinees=BLUEPRINT["min_examinees"]):
+    """
+    Read the grader's analisis_banco.csv into {(file, row): difficulty},
+    keeping only items seen by at least min_examinees students
+    """
+    if not history_path or not os.path.exists(history_path):
+        return {}
+    history = pd.read_csv(history_path)
+    history = history[(history['examinados'] >= min_examinees) & history['dificultad'].notna()]
+    return {(archivo, int(fila)): float(dificultad) for archivo, fila, dificultad in
+            zip(history['archivo'], history['fila'], history['dificultad'])}
+
+class ItemBank:
+    """
+    Question bank as flat arrays (subject, CSV row, difficulty, tag) with
+    item ids grouped by subject, by (subject, difficulty band) and by topic
+    tag, so assembly only ever scans the items it can use
+    """
+
+    def __init__(self, subjects, subject_ids, row_ids, difficulty, tags):
+        self.subjects = list(subjects)
+        self.bands = list(DIFFICULTY_BANDS)
+        self.subject_ids = np.asarray(subject_ids, dtype=np.int16)
+        self.row_ids = np.asarray(row_ids, dtype=np.int64)
+        self.difficulty = np.asarray(difficulty, dtype=float)
+        self.band_ids = difficulty_bands(self.difficulty)
+
+        # Tags are numbered across the bank as (subject, tag) pairs; -1 means untagged
+        tags = np.asarray(tags, dtype=object)
+        tagged = np.array([isinstance(tag, str) and tag.strip() != '' for tag in tags], dtype=bool)
+        keys = np.array([f"{subject}\x00{tag}" for subject, tag in zip(self.subject_ids[tagged], tags[tagged])], dtype=str)
+        self.tag_names, tag_ids = np.unique(keys, return_inverse=True)
+        self.tag_ids = np.full(len(tags), -1, dtype=np.int64)
+        self.tag_ids[tagged] = tag_ids
+
+        self.by_subject = {}
+        self.by_subject_band = {}
+        order = np.lexsort((self.band_ids, self.subject_ids))
+        for subject_id in range(len(self.subjects)):
+            items = order[self.subject_ids[order] == subject_id]
+            self.by_subject[subject_id] = items
+            for band_id in range(len(self.bands)):
+                self.by_subject_band[(subject_id, band_id)] = items[self.band_ids[items] == band_id]
+
+        tagged_items = np.flatnonzero(tagged)
+        tagged_items = tagged_items[np.argsort(self.tag_ids[tagged_items], kind='stable')]
+        boundaries = np.flatnonzero(np.diff(self.tag_ids[tagged_items])) + 1
+        self.by_tag = np.split(tagged_items, boundaries) if len(tagged_items) else []
+
+    def __len__(self):
+        return len(self.subject_ids)
+
+    @classmethod
+    def from_questions(cls, questions, history=None, blueprint=BLUEPRINT, excluded=None):
+        """
+        Index the question DataFrames returned by load_questions. Difficulty
+        comes from the item-analysis history when it is trusted, else from a
+        'difficulty' column, else blueprint["default_difficulty"].
+        excluded gives CSV rows to leave out per subject (e.g. near-duplicates)
+        """
+        history = history or {}
+        excluded = excluded or {}
+        subjects = list(FILE_MAPPING)
+        subject_ids, row_ids, difficulty, tags = [], [], [], []
+        for subject_id, subject in enumerate(subjects):
+            if subject not in questions:
+                continue
+            df = questions[subject]
+            declared = pd.to_numeric(df['difficulty'], errors='coerce') if 'difficulty' in df.columns else pd.Series(np.nan, index=df.index)
+            declared_tags = list(df['tag']) if 'tag' in df.columns else [None] * len(df)
+            for row_id, (value, tag) in enumerate(zip(declared, declared_tags)):
+                if row_id in excluded.get(subject, ()):
+                    continue
+                known = history.get((FILE_MAPPING[subject], row_id))
+                if known is None:
+                    known = value if pd.notna(value) else blueprint["default_difficulty"]
+                subject_ids.append(subject_id)
+                row_ids.append(row_id)
+                difficulty.append(known)
+                tags.append(tag)
+        return cls(subjects, subject_ids, row_ids, difficulty, tags)
+
+    def items(self, subject, band=None, tag=None):
+        """Item ids of a subject, optionally of one difficulty band or topic tag"""
+        subject_id = self.subjects.index(subject)
+        if band is not None:
+            return self.by_subject_band[(subject_id, self.bands.index(band))]
+        if tag is not None:
+            key = f"{subject_id}\x00{tag}"
+            tag_id = np.searchsorted(self.tag_names, key)
+            if tag_id >= len(self.tag_names) or self.tag_names[tag_id] != key:
+                return np.array([], dtype=np.int64)
+            return self.by_tag[tag_id]
+        return self.by_subject[subject_id]
+
+    def summary(self):
+        """Number of items per subject and difficulty band"""
+        rows = []
+        for subject_id, subject in enumerate(self.subjects):
+            row = {'materia': subject, 'items': len(self.by_subject[subject_id])}
+            for band_id, band in enumerate(self.bands):
+                row[band] = len(self.by_subject_band[(subject_id, band_id)])
+            rows.append(row)
+        return pd.DataFrame(rows)
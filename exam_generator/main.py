@@ -1,10 +1,19 @@
 import os
+import argparse
 import pandas as pd
 import random
+import numpy as np
 from reportlab.lib.pagesizes import letter
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, ListFlowable, ListItem
 from reportlab.lib.styles import getSampleStyleSheet
 from config import FILE_MAPPING, EXAM_STRUCTURE, EXAM_TYPES
+from item_bank import ItemBank, load_difficulty_history
+from assembly import assemble_forms, form_selections, warn_off_blueprint
+from bank_lint import SIGNATURE_CACHE_FILE, lint_bank, duplicate_rows, save_bank_lint
+from shared import load_grader_module
+
+# Logo drawing is shared with the grader's reports (calificator/pdf_resources.py)
+logo_page_decorator = load_grader_module("pdf_resources").logo_page_decorator
 
 def load_questions(questions_dir):
     """Load all question files into a dictionary"""
@@ -29,9 +38,16 @@ def load_questions(questions_dir):
             print(f"Warning: File {filename} not found")
     return questions
 
-def generate_exam(questions, exam_structure, exam_type, output_dir):
-    """Generate an exam based on the given structure"""
+def generate_exam(questions, exam_structure, exam_type, output_dir, selections=None, excluded=None):
+    """
+    Generate an exam based on the given structure.
+    selections optionally gives the bank rows to use per subject (e.g. from
+    assembly.py); otherwise questions are drawn at random, skipping the rows
+    in excluded (e.g. near-duplicates found by bank_lint.py).
+    Returns the answers and, for every position, the (subject, bank row) it came from
+    """
     answers = []
+    provenance = []
     question_number = 1
     
     # Create PDF document
@@ -67,12 +83,18 @@ def generate_exam(questions, exam_structure, exam_type, output_dir):
                 
             # Get available questions for this subject
             available_questions = questions[subject]
-            if len(available_questions) < num_questions:
-                print(f"Warning: Not enough questions for {subject}. Requested {num_questions}, but only {len(available_questions)} available.")
-                num_questions = len(available_questions)
+            candidate_rows = range(len(available_questions))
+            if excluded and excluded.get(subject):
+                candidate_rows = [row for row in candidate_rows if row not in excluded[subject]]
+            if len(candidate_rows) < num_questions:
+                print(f"Warning: Not enough questions for {subject}. Requested {num_questions}, but only {len(candidate_rows)} available.")
+                num_questions = len(candidate_rows)
             
-            # Select random questions
-            selected_indices = random.sample(range(len(available_questions)), num_questions)
+            # Use the assembled selection, or select random questions
+            if selections is not None and subject in selections:
+                selected_indices = list(selections[subject])
+            else:
+                selected_indices = random.sample(candidate_rows, num_questions)
             selected_questions = available_questions.iloc[selected_indices]
             
             # Add subject subheading
@@ -80,7 +102,7 @@ def generate_exam(questions, exam_structure, exam_type, output_dir):
             elements.append(Spacer(1, 6))
             
             # Add questions
-            for _, row in selected_questions.iterrows():
+            for row_id, (_, row) in zip(selected_indices, selected_questions.iterrows()):
                 # Question text
                 question_text = f"{question_number}. {row['question']}"
                 elements.append(Paragraph(question_text, normal_style))
@@ -98,13 +120,14 @@ def generate_exam(questions, exam_structure, exam_type, output_dir):
                 
                 # Store answer
                 answers.append(str(row['answer']))
+                provenance.append((subject, row_id))
                 question_number += 1
     
     # Build the PDF
-    doc.build(elements)
+    doc.build(elements, onFirstPage=logo_page_decorator, onLaterPages=logo_page_decorator)
     
     print(f"Exam Type {exam_type} generated successfully and saved to {pdf_file}")
-    return answers
+    return answers, provenance
 
 def generate_answer_keys(all_answers, output_dir):
     """Generate answer keys in the requested format"""
@@ -116,7 +139,47 @@ def generate_answer_keys(all_answers, output_dir):
     
     print(f"Answer keys generated successfully and saved to {keys_file}")
 
+def generate_question_manifest(all_answers, all_provenance, output_dir):
+    """
+    Save the question manifest: for every exam type and position, the subject
+    (index into FILE_MAPPING), the row of that subject's CSV and the correct option.
+    Row IDs are 0-based data rows of the CSV (header excluded).
+    """
+    subjects = list(FILE_MAPPING.keys())
+    exam_types = list(all_answers.keys())
+    num_positions = max((len(answers) for answers in all_answers.values()), default=0)
+
+    # 255 marks a position that was not filled (not enough questions in the bank)
+    subject_ids = np.full((len(exam_types), num_positions), 255, dtype=np.uint8)
+    row_ids = np.zeros((len(exam_types), num_positions), dtype=np.uint32)
+    correct_options = np.zeros((len(exam_types), num_positions), dtype=np.uint8)
+
+    for t, exam_type in enumerate(exam_types):
+        for position, ((subject, row_id), answer) in enumerate(zip(all_provenance[exam_type], all_answers[exam_type])):
+            subject_ids[t, position] = subjects.index(subject)
+            row_ids[t, position] = row_id
+            # 1-4 for A-D, 0 for anything else
+            correct_options[t, position] = 'ABCD'.index(answer) + 1 if answer in ('A', 'B', 'C', 'D') else 0
+
+    manifest_file = os.path.join(output_dir, "question_manifest.npz")
+    np.savez_compressed(
+        manifest_file,
+        exam_types=np.array(exam_types),
+        subjects=np.array(subjects),
+        files=np.array([FILE_MAPPING[subject] for subject in subjects]),
+        subject_ids=subject_ids,
+        row_ids=row_ids,
+        correct_options=correct_options
+    )
+
+    print(f"Question manifest generated successfully and saved to {manifest_file}")
+
 def main():
+    parser = argparse.ArgumentParser(description="Generate the exam types, answer keys and question manifest")
+    parser.add_argument('--blueprint', action='store_true', help="assemble balanced forms (config.BLUEPRINT) instead of drawing at random")
+    parser.add_argument('--history', help="item analysis history (default: calificator/output/analisis_banco.csv)")
+    args = parser.parse_args()
+    
     # Create output directory if it doesn't exist
     script_dir = os.path.dirname(os.path.abspath(__file__))
     output_dir = os.path.join(script_dir, "output")
@@ -129,18 +192,38 @@ def main():
     print(f"Loading questions from {questions_dir}...")
     questions = load_questions(questions_dir)
     
+    # Near-duplicate items are reported and only one of each group can be drawn
+    clusters = lint_bank(questions, cache_path=os.path.join(output_dir, SIGNATURE_CACHE_FILE))
+    save_bank_lint(clusters, output_dir)
+    excluded = duplicate_rows(clusters)
+    
+    # Assemble all forms against the blueprint, with difficulty from past item analysis
+    forms = {}
+    if args.blueprint:
+        history_path = args.history or os.path.join(os.path.dirname(script_dir), "calificator", "output", "analisis_banco.csv")
+        bank = ItemBank.from_questions(questions, load_difficulty_history(history_path), excluded=excluded)
+        assembled, report = assemble_forms(bank, len(EXAM_TYPES), seed=0, names=EXAM_TYPES)
+        forms = {exam_type: form_selections(bank, form) for exam_type, form in zip(EXAM_TYPES, assembled)}
+        report_file = os.path.join(output_dir, "ensamblaje_formas.csv")
+        report.to_csv(report_file, index=False)
+        print(f"Form assembly report saved to {report_file}")
+        warn_off_blueprint(report)
+    
     # Generate exams for each type
     all_answers = {}
+    all_provenance = {}
     for exam_type in EXAM_TYPES:
         print(f"\nGenerating exam type {exam_type}...")
         # Set a different random seed for each exam type to ensure they're different
         random.seed(ord(exam_type))
-        answers = generate_exam(questions, EXAM_STRUCTURE, exam_type, output_dir)
+        answers, provenance = generate_exam(questions, EXAM_STRUCTURE, exam_type, output_dir, forms.get(exam_type), excluded)
         all_answers[exam_type] = answers
+        all_provenance[exam_type] = provenance
     
     # Generate answer keys
     print("\nGenerating answer keys...")
     generate_answer_keys(all_answers, output_dir)
+    generate_question_manifest(all_answers, all_provenance, output_dir)
     
     print("\nAll exams and answer keys generated successfully!")
 
@@ -0,0 +1,20 @@
+import os
+import functools
+import importlib.util
+
+CALIFICATOR_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "calificator")
+
+@functools.lru_cache(maxsize=None)
+def load_grader_module(name):
+    """
+    Load one of the grader's self-contained modules (e.g. lsh, pdf_resources)
+    so both tools share a single implementation (calificator/shared.py
+    mirrors this for the generator's modules). Both tools have modules
+    with the same names (config, main), so it is loaded by path under a
+    prefixed name instead of through sys.path
+    """
+    module_name = f"calificator_{name}"
+    spec = importlib.util.spec_from_file_location(module_name, os.path.join(CALIFICATOR_DIR, f"{name}.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The generator's modules import each other by file name (from config import ...)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
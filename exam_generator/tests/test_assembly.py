@@ -0,0 +1,34 @@
+import numpy as np
+
+from config import FILE_MAPPING
+from item_bank import ItemBank
+from assembly import FormAssembler, subject_counts
+
+def test_repair_uses_every_band_under_target():
+    # Plenty of hard and medium items in every subject but no easy ones, so
+    # the easy band can never receive a swap
+    subjects = list(FILE_MAPPING)
+    counts = dict(subject_counts())
+    subject_ids, row_ids, difficulty = [], [], []
+    for subject_id, subject in enumerate(subjects):
+        size = 4 * counts.get(subject, 1)
+        subject_ids.extend([subject_id] * size)
+        row_ids.extend(range(size))
+        difficulty.extend([0.2] * (size - size // 4) + [0.5] * (size // 4))
+    bank = ItemBank(subjects, subject_ids, row_ids, difficulty, [None] * len(subject_ids))
+    assembler = FormAssembler(bank, seed=0)
+
+    # Start from an all-hard form
+    selections = [list(bank.by_subject_band[(subject_id, 0)][:count]) for subject_id, count in assembler.counts]
+    chosen = np.zeros(len(bank), dtype=bool)
+    chosen[np.concatenate(selections)] = True
+    band_counts = np.array([assembler.num_questions, 0, 0])
+    tag_counts = np.zeros(1, dtype=np.int64)
+
+    swaps = assembler._repair(selections, chosen, band_counts, tag_counts)
+
+    # Hard items move to medium until it is on target; only the easy gap is left
+    assert list(assembler.targets) == [30, 40, 30]
+    assert list(band_counts) == [60, 40, 0]
+    assert swaps == 40
+    assert sum(bank.band_ids[item] == 1 for items in selections for item in items) == 40
@@ -0,0 +1,24 @@
+import os
+import pandas as pd
+
+from config import FILE_MAPPING
+from bank_lint import lint_bank, duplicate_rows, lsh_candidate_pairs
+
+def test_lsh_is_shared_with_the_grader():
+    assert os.path.samefile(lsh_candidate_pairs.__code__.co_filename,
+                            os.path.join(os.path.dirname(__file__), "..", "..", "calificator", "lsh.py"))
+
+def test_near_duplicate_across_subjects_is_excluded():
+    first, second = list(FILE_MAPPING)[:2]
+    columns = ['question', 'alternative_a', 'alternative_b', 'alternative_c', 'alternative_d', 'answer']
+    questions = {
+        first: pd.DataFrame([
+            ["¿Cuál es la capital del Perú?", "Lima", "Cusco", "Arequipa", "Trujillo", "A"],
+            ["¿Cuánto es la suma de dos más dos?", "3", "4", "5", "6", "B"],
+        ], columns=columns),
+        second: pd.DataFrame([
+            ["¿Cuál es la capital del PERU?", "Lima", "Cusco", "Arequipa", "Trujillo", "A"],
+        ], columns=columns),
+    }
+    clusters = lint_bank(questions)
+    assert duplicate_rows(clusters) == {second: {0}}